@@ -0,0 +1,126 @@
+"""
+Admission control for the Knowledge Graph Extractor upload path
+A global processing semaphore plus per-client token buckets, shared by the
+Flask backend and the standard-library server
+"""
+
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+class Rejection:
+    """Why an upload was turned away and when the client may retry"""
+
+    def __init__(self, status_code, reason, retry_after):
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    def to_dict(self):
+        return {"error": self.reason, "retry_after": self.retry_after}
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second up to `capacity`"""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now):
+        """Consume one token; returns 0 on success or seconds until one is available"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Decides whether an upload may start processing.
+
+    Each client gets a token bucket (rate limit, 429 when empty) and all
+    clients share a semaphore bounding concurrent processing jobs (503 when
+    full). Both checks fail fast instead of queueing. Buckets are kept in an
+    LRU so idle clients do not accumulate. A rate of 0 disables rate limiting.
+    """
+
+    def __init__(self, max_concurrent=4, rate_per_minute=10, burst=5, max_clients=10000):
+        self.max_concurrent = max_concurrent
+        self.rate = max(rate_per_minute, 0) / 60.0
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._active = 0
+        self.metrics = Counter()
+
+    def _check_rate(self, client_id, now):
+        with self._lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst, now)
+                self._buckets[client_id] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client_id)
+            return bucket.take(now)
+
+    def try_acquire(self, client_id):
+        """Admit a job for client_id; returns None if admitted, else a Rejection.
+
+        Capacity is checked before the rate limit so a client turned away
+        because the server is busy keeps its token for the retry. An admitted
+        caller must call release() when processing finishes.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.metrics['rejected_overloaded'] += 1
+            return Rejection(503, 'Server is busy processing other documents', 5)
+
+        wait = self._check_rate(client_id, time.monotonic()) if self.rate > 0 else 0
+        if wait:
+            self._slots.release()
+            with self._lock:
+                self.metrics['rejected_rate_limited'] += 1
+            return Rejection(429, 'Too many uploads, please slow down', wait)
+
+        with self._lock:
+            self._active += 1
+            self.metrics['admitted'] += 1
+        return None
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def snapshot(self):
+        """Current counters for the metrics endpoint"""
+        with self._lock:
+            return {
+                "active_jobs": self._active,
+                "max_concurrent_jobs": self.max_concurrent,
+                "tracked_clients": len(self._buckets),
+                "admitted": self.metrics['admitted'],
+                "rejected_rate_limited": self.metrics['rejected_rate_limited'],
+                "rejected_overloaded": self.metrics['rejected_overloaded']
+            }
+
+
+def admission_from_env():
+    """Build an AdmissionController from KG_* environment settings"""
+    return AdmissionController(
+        max_concurrent=int(os.environ.get('KG_MAX_CONCURRENT_JOBS', '4')),
+        rate_per_minute=float(os.environ.get('KG_UPLOADS_PER_MINUTE', '10')),
+        burst=int(os.environ.get('KG_UPLOAD_BURST', '5'))
+    )
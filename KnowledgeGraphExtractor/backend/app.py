@@ -1,15 +1,21 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
 import os
 import uuid
+import threading
 from werkzeug.utils import secure_filename
 import PyPDF2
 import networkx as nx
 from collections import defaultdict, Counter
-import json
 import re
 from datetime import datetime
 import logging
+from storage import storage_from_env
+from admission import admission_from_env
+from page_cache import PageCacheStats, page_cache_from_env
+from extractors import get_extractor, spacy_installed
+from serialization import JSON_MIMETYPE, dumps, encoder_name, write_json
+from graph_query import EntityNotFound, GraphIndexCache, DEFAULT_NODE_LIMIT
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,22 +32,99 @@ ALLOWED_EXTENSIONS = {'pdf'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['PROCESSED_FOLDER'] = PROCESSED_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
+# Low-memory mode streams pages through segmentation/extraction and writes
+# each chapter to disk as soon as it is processed
+app.config['LOW_MEMORY_MODE'] = os.environ.get('KG_LOW_MEMORY_MODE', '0') == '1'
+app.config['JOB_MEMORY_BUDGET_MB'] = int(os.environ.get('KG_JOB_MEMORY_BUDGET_MB', '256'))
+app.config['EVICTION_INTERVAL_SECONDS'] = int(os.environ.get('KG_EVICTION_INTERVAL_SECONDS', '3600'))
 
-# Create directories if they don't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(PROCESSED_FOLDER, exist_ok=True)
+# Sharded upload/result storage (creates the directories if they don't exist)
+storage = storage_from_env(UPLOAD_FOLDER, PROCESSED_FOLDER)
+storage.start_background_eviction(app.config['EVICTION_INTERVAL_SECONDS'])
 
-# Simple NLP without spaCy for demo purposes
-nlp = None
+# Global processing concurrency limit and per-client upload rate limits
+admission = admission_from_env()
+
+# Adjacency indexes for subgraph queries, built once per processed document
+graph_indexes = GraphIndexCache(max_documents=int(os.environ.get('KG_GRAPH_INDEX_CACHE_SIZE', '16')))
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+class MemoryBudgetExceeded(Exception):
+    """Raised when a low-memory job grows past its memory budget"""
+
+def current_rss_bytes():
+    """Current resident set size of this process in bytes (0 if unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    # Without /proc (e.g. macOS) only psutil reports current RSS; getrusage's
+    # ru_maxrss is the lifetime peak and would never go down
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return 0
+
+# RSS is process-wide, so low-memory jobs run one at a time per process; that
+# way the growth MemoryBudget measures belongs to the job being checked
+low_memory_job_lock = threading.Lock()
+
+class MemoryBudget:
+    """Tracks RSS growth of a processing job against a byte budget.
+
+    Growth is measured as process RSS minus RSS when the job started, so it
+    is only attributable to one job while low_memory_job_lock is held.
+    Checks are skipped where current RSS cannot be read.
+    """
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.baseline = current_rss_bytes()
+        self.peak = 0
+
+    @property
+    def chapter_buffer_limit(self):
+        """Largest chapter body (in characters) kept in memory before splitting"""
+        return max(self.budget_bytes // 8, 64 * 1024)
+
+    def check(self):
+        """Record current usage and raise if the job is over budget"""
+        rss = current_rss_bytes()
+        if not rss:
+            return
+        used = max(rss - self.baseline, 0)
+        self.peak = max(self.peak, used)
+        if used > self.budget_bytes:
+            raise MemoryBudgetExceeded(
+                f"Job used {used // (1024 * 1024)}MB, budget is {self.budget_bytes // (1024 * 1024)}MB"
+            )
+
 class PDFProcessor:
     def __init__(self):
-        self.nlp = nlp
+        # spaCy when installed (loaded lazily), otherwise the heuristic extractor
+        self.extractor = get_extractor()
+        # Page text reused across documents, keyed by page content hash
+        self.page_cache = page_cache_from_env()
         
-    def extract_text_from_pdf(self, pdf_path):
+    def extract_page_text(self, page, cache_stats=None):
+        """Text of one page, served from the page cache when its content is unchanged"""
+        if self.page_cache is None:
+            return page.extract_text()
+        return self.page_cache.extract(page, cache_stats)
+
+    def new_cache_stats(self):
+        """Page cache counters for one document, or None when the cache is disabled"""
+        return PageCacheStats() if self.page_cache is not None else None
+
+    def flush_page_cache(self):
+        """Record the page cache hits of the document just read, in one write"""
+        if self.page_cache is not None:
+            self.page_cache.flush()
+    
+    def extract_text_from_pdf(self, pdf_path, cache_stats=None):
         """Extract text from PDF file"""
         try:
             with open(pdf_path, 'rb') as file:
@@ -49,7 +132,7 @@ class PDFProcessor:
                 text = ""
                 for page_num, page in enumerate(pdf_reader.pages):
                     try:
-                        page_text = page.extract_text()
+                        page_text = self.extract_page_text(page, cache_stats)
                         text += f"\n--- Page {page_num + 1} ---\n{page_text}"
                     except Exception as e:
                         logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
@@ -58,18 +141,108 @@ class PDFProcessor:
         except Exception as e:
             logger.error(f"Error reading PDF: {e}")
             return None
+        finally:
+            self.flush_page_cache()
     
+    def iter_pdf_pages(self, pdf_path, cache_stats=None):
+        """Yield the text of each PDF page in turn without building the full document"""
+        try:
+            with open(pdf_path, 'rb') as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                for page_num, page in enumerate(pdf_reader.pages):
+                    try:
+                        page_text = self.extract_page_text(page, cache_stats)
+                    except Exception as e:
+                        logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
+                        continue
+                    yield f"\n--- Page {page_num + 1} ---\n{page_text}"
+        finally:
+            self.flush_page_cache()
+
+    # Common chapter patterns
+    CHAPTER_PATTERNS = [
+        r'(?i)^chapter\s+\d+',
+        r'(?i)^chapter\s+[ivxlcdm]+',  # Roman numerals
+        r'(?i)^\d+\.\s+[A-Z]',
+        r'(?i)^[A-Z][A-Z\s]{10,}$',  # All caps titles
+        r'(?i)^part\s+\d+',
+        r'(?i)^section\s+\d+'
+    ]
+
+    @staticmethod
+    def _iter_lines(pages):
+        """Yield the lines of the concatenated pages, as text.split('\\n') would"""
+        tail = ""
+        for page_text in pages:
+            lines = (tail + page_text).split('\n')
+            tail = lines.pop()
+            yield from lines
+        yield tail
+
+    def iter_chapters(self, pages, max_chapter_chars=None):
+        """Stream chapters out of an iterable of page texts.
+
+        Applies the same boundary rules as detect_chapters, but only the
+        chapter currently being built is held in memory. Chapters longer than
+        max_chapter_chars are split into continuation parts.
+        """
+        chapter_patterns = [re.compile(p) for p in self.CHAPTER_PATTERNS]
+        title, parts, size, start_line = "Introduction", [], 0, 0
+        pending = None  # first chapter is held back until we know there is a second
+        emitted = 0
+        continuation = 1
+
+        def make_chapter():
+            return {"title": title, "content": "".join(parts), "start_line": start_line}
+
+        for i, line in enumerate(self._iter_lines(pages)):
+            line = line.strip()
+            if not line:
+                continue
+
+            is_chapter = any(p.match(line) for p in chapter_patterns)
+            # A continuation part is already past the minimum length, whatever its own size
+            if is_chapter and continuation > 1 and not size:
+                # The heading arrived right after a split: retitle the empty part
+                title, start_line, continuation = line[:100], i, 1
+                continue
+            if is_chapter and (size > 100 or continuation > 1):  # Minimum content length
+                chapter = make_chapter()
+                if pending is not None:
+                    yield pending
+                    emitted += 1
+                pending = chapter
+                title, parts, size, start_line = line[:100], [], 0, i
+                continuation = 1
+                continue
+
+            parts.append(line + "\n")
+            size += len(line) + 1
+            if max_chapter_chars and size > max_chapter_chars:
+                chapter = make_chapter()
+                if pending is not None:
+                    yield pending
+                    emitted += 1
+                pending = chapter
+                continuation += 1
+                base_title = title.split(' (part ')[0]
+                title, parts, size, start_line = f"{base_title} (part {continuation})", [], 0, i
+
+        if pending is None:
+            # Zero or one chapter detected: treat the whole text as one chapter
+            if size:
+                yield {"title": "Complete Document", "content": "".join(parts), "start_line": 0}
+            return
+
+        if emitted == 0 and not size:
+            pending["title"] = "Complete Document"
+        yield pending
+        if size:
+            yield make_chapter()
+
     def detect_chapters(self, text):
         """Detect chapter boundaries in the text"""
-        # Common chapter patterns
-        chapter_patterns = [
-            r'(?i)^chapter\s+\d+',
-            r'(?i)^chapter\s+[ivxlcdm]+',  # Roman numerals
-            r'(?i)^\d+\.\s+[A-Z]',
-            r'(?i)^[A-Z][A-Z\s]{10,}$',  # All caps titles
-            r'(?i)^part\s+\d+',
-            r'(?i)^section\s+\d+'
-        ]
+        chapter_patterns = self.CHAPTER_PATTERNS
         
         lines = text.split('\n')
         chapters = []
@@ -112,65 +285,9 @@ class PDFProcessor:
         return chapters
     
     def extract_entities_and_relations(self, text):
-        """Extract entities and relationships from text using simple pattern matching"""
-        # Simple entity extraction using basic patterns
-        entities = []
-        relations = []
-
-        # Simple patterns for common entities
-        import re
-
-        # Extract capitalized words as potential entities
-        words = text.split()
-        capitalized_words = []
-
-        for i, word in enumerate(words):
-            # Clean word of punctuation
-            clean_word = re.sub(r'[^\w\s]', '', word)
-            if clean_word and clean_word[0].isupper() and len(clean_word) > 2:
-                # Skip common words
-                if clean_word.lower() not in ['the', 'and', 'but', 'for', 'are', 'this', 'that', 'with', 'have', 'will', 'you', 'they', 'been', 'their', 'said', 'each', 'which', 'she', 'how', 'its', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'may', 'put', 'say', 'she', 'too', 'use']:
-                    capitalized_words.append(clean_word)
-
-        # Create entities from unique capitalized words
-        unique_words = list(set(capitalized_words))
-        for i, word in enumerate(unique_words[:20]):  # Limit to 20 entities
-            entity_type = self._guess_entity_type(word)
-            entities.append({
-                "text": word,
-                "label": entity_type,
-                "start": 0,
-                "end": len(word),
-                "description": f"Detected {entity_type.lower()}"
-            })
+        """Extract entities and relationships from text with the configured extractor backend"""
+        return self.extractor.extract(text)
 
-        # Create simple relationships between entities
-        for i in range(min(len(entities), 10)):
-            for j in range(i + 1, min(len(entities), 10)):
-                if i != j:
-                    relations.append({
-                        "source": entities[i]["text"],
-                        "target": entities[j]["text"],
-                        "relation": "related_to",
-                        "sentence": f"{entities[i]['text']} is related to {entities[j]['text']}"
-                    })
-
-        return {"entities": entities, "relations": relations}
-
-    def _guess_entity_type(self, word):
-        """Simple heuristic to guess entity type"""
-        # Common patterns for different entity types
-        if any(suffix in word.lower() for suffix in ['corp', 'inc', 'ltd', 'llc', 'company', 'group']):
-            return 'ORG'
-        elif any(title in word.lower() for title in ['dr', 'prof', 'mr', 'ms', 'mrs']):
-            return 'PERSON'
-        elif word.lower() in ['usa', 'america', 'china', 'japan', 'germany', 'france', 'uk', 'canada']:
-            return 'GPE'
-        elif len(word) > 8:  # Longer words might be concepts
-            return 'CONCEPT'
-        else:
-            return 'PERSON'  # Default to person
-    
     def create_knowledge_graph(self, entities, relations):
         """Create a knowledge graph structure"""
         # Create NetworkX graph
@@ -180,7 +297,9 @@ class PDFProcessor:
         for entity in entities:
             G.add_node(entity["text"], 
                       label=entity["label"], 
-                      description=entity["description"])
+                      description=entity["description"],
+                      mentions=entity.get("mentions", 1),
+                      aliases=entity.get("aliases", []))
         
         # Add edges (relations)
         for relation in relations:
@@ -197,6 +316,8 @@ class PDFProcessor:
                 "label": node[0],
                 "type": node[1].get("label", "UNKNOWN"),
                 "description": node[1].get("description", ""),
+                "mentions": node[1].get("mentions", 1),
+                "aliases": node[1].get("aliases", []),
                 "size": G.degree(node[0]) * 5 + 10  # Size based on connections
             })
         
@@ -219,11 +340,85 @@ class PDFProcessor:
             }
         }
 
+    def process_chapter(self, index, chapter, extraction_result=None):
+        """Run extraction (unless already done in a batch) and graph construction for one chapter"""
+        logger.info(f"Processing chapter {index+1}: {chapter['title'][:50]}...")
+        
+        # Extract entities and relations
+        if extraction_result is None:
+            extraction_result = self.extract_entities_and_relations(chapter['content'])
+        
+        if 'error' in extraction_result:
+            knowledge_graph = {"nodes": [], "edges": [], "stats": {"total_nodes": 0, "total_edges": 0, "density": 0}}
+            error_msg = extraction_result['error']
+        else:
+            # Create knowledge graph
+            knowledge_graph = self.create_knowledge_graph(
+                extraction_result['entities'], 
+                extraction_result['relations']
+            )
+            error_msg = None
+        
+        processed_chapter = {
+            "id": index + 1,
+            "title": chapter['title'],
+            "content_preview": chapter['content'][:500] + "..." if len(chapter['content']) > 500 else chapter['content'],
+            "word_count": len(chapter['content'].split()),
+            "knowledge_graph": knowledge_graph,
+            "error": error_msg
+        }
+        return processed_chapter
+    
+
+    def process_pdf_low_memory(self, pdf_path, result_path, header, budget, cache_stats=None):
+        """Stream a PDF page by page and write each chapter result straight to disk.
+
+        Only the chapter currently being built and its processed result are held
+        in memory. The result file is written to a temporary path and moved into
+        place only if at least one chapter was written. Returns the number of
+        chapters written.
+        """
+        tmp_path = result_path + '.part'
+        total = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(dumps(header)[:-1] + b',"chapters":[')
+                pages = self.iter_pdf_pages(pdf_path, cache_stats)
+                for i, chapter in enumerate(self.iter_chapters(pages, budget.chapter_buffer_limit)):
+                    budget.check()
+                    processed_chapter = self.process_chapter(i, chapter)
+                    del chapter
+                    if i:
+                        f.write(b',')
+                    f.write(dumps(processed_chapter))
+                    total += 1
+                    budget.check()
+                trailer = {
+                    "total_chapters": total,
+                    "page_cache": cache_stats.to_dict() if cache_stats is not None else None
+                }
+                f.write(b'],' + dumps(trailer)[1:])
+            # A document with no chapters is a failure; don't leave a result behind
+            if total:
+                os.replace(tmp_path, result_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return total
+
 processor = PDFProcessor()
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """Upload and process PDF file"""
+    # Reject before the request body is parsed so turned-away uploads stay cheap
+    rejection = admission.try_acquire(request.remote_addr or 'unknown')
+    if rejection:
+        logger.warning(f"Rejected upload from {request.remote_addr}: {rejection.reason}")
+        response = jsonify(rejection.to_dict())
+        response.headers['Retry-After'] = str(rejection.retry_after)
+        return response, rejection.status_code
+    
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
@@ -238,14 +433,19 @@ def upload_file():
         # Generate unique filename
         file_id = str(uuid.uuid4())
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{filename}")
+        file_path = storage.upload_path(file_id, filename)
         
         # Save file
         file.save(file_path)
         
+        if app.config['LOW_MEMORY_MODE']:
+            return upload_file_low_memory(file_path, file_id, filename)
+        
         # Extract text from PDF
         logger.info(f"Processing PDF: {filename}")
-        text = processor.extract_text_from_pdf(file_path)
+        cache_stats = processor.new_cache_stats()
+        text = processor.extract_text_from_pdf(file_path, cache_stats)
+        log_page_cache(filename, cache_stats)
         
         if not text:
             return jsonify({'error': 'Failed to extract text from PDF'}), 500
@@ -254,86 +454,179 @@ def upload_file():
         chapters = processor.detect_chapters(text)
         logger.info(f"Detected {len(chapters)} chapters")
         
-        # Process each chapter
+        # Process each chapter, streaming chapter text through the extractor in batches
+        extraction_results = processor.extractor.extract_many(c['content'] for c in chapters)
         processed_chapters = []
-        for i, chapter in enumerate(chapters):
-            logger.info(f"Processing chapter {i+1}: {chapter['title'][:50]}...")
-            
-            # Extract entities and relations
-            extraction_result = processor.extract_entities_and_relations(chapter['content'])
-            
-            if 'error' in extraction_result:
-                knowledge_graph = {"nodes": [], "edges": [], "stats": {"total_nodes": 0, "total_edges": 0, "density": 0}}
-                error_msg = extraction_result['error']
-            else:
-                # Create knowledge graph
-                knowledge_graph = processor.create_knowledge_graph(
-                    extraction_result['entities'], 
-                    extraction_result['relations']
-                )
-                error_msg = None
-            
-            processed_chapter = {
-                "id": i + 1,
-                "title": chapter['title'],
-                "content_preview": chapter['content'][:500] + "..." if len(chapter['content']) > 500 else chapter['content'],
-                "word_count": len(chapter['content'].split()),
-                "knowledge_graph": knowledge_graph,
-                "error": error_msg
-            }
-            processed_chapters.append(processed_chapter)
+        for i, (chapter, extraction_result) in enumerate(zip(chapters, extraction_results)):
+            processed_chapters.append(processor.process_chapter(i, chapter, extraction_result))
         
-        # Save processed data
+        # Save processed data; the response is served from the same encoded file
         result_data = {
+            "success": True,
             "file_id": file_id,
             "filename": filename,
             "upload_time": datetime.now().isoformat(),
             "total_chapters": len(processed_chapters),
+            "page_cache": cache_stats.to_dict() if cache_stats is not None else None,
             "chapters": processed_chapters
         }
         
-        result_path = os.path.join(app.config['PROCESSED_FOLDER'], f"{file_id}_result.json")
-        with open(result_path, 'w', encoding='utf-8') as f:
-            json.dump(result_data, f, indent=2, ensure_ascii=False)
+        result_path = storage.result_path(file_id)
+        write_json(result_path, result_data)
+        storage.discard_upload(file_path)
         
         logger.info(f"Processing completed for {filename}")
         
-        return jsonify({
-            "success": True,
-            "file_id": file_id,
-            "filename": filename,
-            "total_chapters": len(processed_chapters),
-            "chapters": processed_chapters
-        })
+        return send_result_file(result_path)
         
     except Exception as e:
         logger.error(f"Error processing file: {e}")
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+    finally:
+        admission.release()
+
+def upload_file_low_memory(file_path, file_id, filename):
+    """Process an uploaded PDF in low-memory mode and return the result file"""
+    logger.info(f"Processing PDF (low-memory mode): {filename}")
+    cache_stats = processor.new_cache_stats()
+    result_path = storage.result_path(file_id)
+    header = {
+        "success": True,
+        "file_id": file_id,
+        "filename": filename,
+        "upload_time": datetime.now().isoformat()
+    }
+    try:
+        with low_memory_job_lock:
+            budget = MemoryBudget(app.config['JOB_MEMORY_BUDGET_MB'] * 1024 * 1024)
+            total = processor.process_pdf_low_memory(
+                file_path,
+                result_path,
+                header,
+                budget,
+                cache_stats
+            )
+    except MemoryBudgetExceeded as e:
+        logger.error(f"Memory budget exceeded for {filename}: {e}")
+        return jsonify({'error': f'Document exceeds the processing memory budget: {e}'}), 413
+    
+    if total == 0:
+        return jsonify({'error': 'Failed to extract text from PDF'}), 500
+    
+    storage.discard_upload(file_path)
+    log_page_cache(filename, cache_stats)
+    logger.info(f"Processing completed for {filename} ({total} chapters, peak {budget.peak // 1024}KB)")
+    return send_result_file(result_path)
+
+def log_page_cache(filename, cache_stats):
+    """Log a document's page cache counters, warning about pages that bypassed the cache"""
+    if cache_stats is None:
+        return
+    logger.info(f"Page cache for {filename}: {cache_stats.hits} hits, {cache_stats.misses} misses "
+                f"({cache_stats.hit_rate:.0%} hit rate)")
+    if cache_stats.uncacheable:
+        logger.warning(f"{cache_stats.uncacheable} pages of {filename} could not be hashed "
+                       f"and were extracted without the page cache")
+
+def send_result_file(result_path):
+    """Stream an already-encoded result file (sendfile under servers that support it)"""
+    return send_file(os.path.abspath(result_path), mimetype=JSON_MIMETYPE, conditional=False)
+
+def json_response(data, status_code=200):
+    """Compact JSON response using the fast encoder when available"""
+    return Response(dumps(data), status=status_code, mimetype=JSON_MIMETYPE)
 
 @app.route('/api/files/<file_id>', methods=['GET'])
 def get_processed_file(file_id):
     """Retrieve processed file data"""
     try:
-        result_path = os.path.join(app.config['PROCESSED_FOLDER'], f"{file_id}_result.json")
+        result_path = storage.find_result(file_id)
         
-        if not os.path.exists(result_path):
+        if result_path is None:
             return jsonify({'error': 'File not found'}), 404
         
-        with open(result_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return jsonify(data)
+        return send_result_file(result_path)
         
     except Exception as e:
         logger.error(f"Error retrieving file {file_id}: {e}")
         return jsonify({'error': 'Failed to retrieve file'}), 500
 
+def load_graph_index(file_id):
+    """Adjacency index for the chapter (or whole document) named in the query string"""
+    result_path = storage.find_result(file_id)
+    if result_path is None:
+        raise EntityNotFound(f"file {file_id}")
+    chapter = request.args.get('chapter', type=int)
+    return graph_indexes.get(result_path).index(chapter)
+
+def graph_filters():
+    """Type / degree / size filters shared by the graph query endpoints"""
+    types = set(t for t in request.args.get('type', '').split(',') if t)
+    return {
+        "types": types or None,
+        "min_degree": request.args.get('min_degree', 0, type=int),
+        "limit": request.args.get('limit', DEFAULT_NODE_LIMIT, type=int)
+    }
+
+@app.route('/api/files/<file_id>/graph/neighborhood', methods=['GET'])
+def graph_neighborhood(file_id):
+    """k-hop neighborhood of an entity"""
+    entity = request.args.get('entity')
+    if not entity:
+        return jsonify({'error': 'entity is required'}), 400
+    try:
+        index = load_graph_index(file_id)
+        return json_response(index.neighborhood(entity, hops=request.args.get('k', 1, type=int), **graph_filters()))
+    except EntityNotFound as e:
+        return jsonify({'error': f'Not found: {e.args[0]}'}), 404
+    except Exception as e:
+        logger.error(f"Error querying neighborhood in {file_id}: {e}")
+        return jsonify({'error': 'Graph query failed'}), 500
+
+@app.route('/api/files/<file_id>/graph/path', methods=['GET'])
+def graph_shortest_path(file_id):
+    """Shortest path between two entities"""
+    source, target = request.args.get('source'), request.args.get('target')
+    if not source or not target:
+        return jsonify({'error': 'source and target are required'}), 400
+    try:
+        result = load_graph_index(file_id).shortest_path(source, target)
+        if result is None:
+            return jsonify({'error': f'No path between {source} and {target}'}), 404
+        return json_response(result)
+    except EntityNotFound as e:
+        return jsonify({'error': f'Not found: {e.args[0]}'}), 404
+    except Exception as e:
+        logger.error(f"Error querying path in {file_id}: {e}")
+        return jsonify({'error': 'Graph query failed'}), 500
+
+@app.route('/api/files/<file_id>/graph/filter', methods=['GET'])
+def graph_filtered(file_id):
+    """Nodes filtered by entity type and minimum degree"""
+    try:
+        return json_response(load_graph_index(file_id).filtered(**graph_filters()))
+    except EntityNotFound as e:
+        return jsonify({'error': f'Not found: {e.args[0]}'}), 404
+    except Exception as e:
+        logger.error(f"Error filtering graph in {file_id}: {e}")
+        return jsonify({'error': 'Graph query failed'}), 500
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Admission control counters"""
+    return jsonify({
+        "admission": admission.snapshot(),
+        "timestamp": datetime.now().isoformat()
+    })
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
-        "spacy_available": nlp is not None,
+        "spacy_available": spacy_installed(),
+        "extractor": processor.extractor.active_name,
+        "json_encoder": encoder_name(),
         "timestamp": datetime.now().isoformat()
     })
 
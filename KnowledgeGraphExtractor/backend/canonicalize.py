@@ -0,0 +1,173 @@
+"""
+Entity canonicalization for the Knowledge Graph Extractor
+Merges surface variants ("Kafka", "Kafka's", "KAFKA") and sub-spans
+("John" -> "John Smith") into one entity using only the standard library
+"""
+
+import json
+import logging
+import os
+import re
+import string
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+POSSESSIVE_RE = re.compile(r"['’]s$", re.IGNORECASE)
+NON_WORD_RE = re.compile(r'[^\w\s]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Marks a trie node whose descendants branch into more than one longer span
+_AMBIGUOUS = object()
+
+
+def clean_mention(word):
+    """Strip surrounding punctuation and a trailing possessive from a raw token"""
+    word = word.strip(string.punctuation + '‘’“”')
+    word = POSSESSIVE_RE.sub('', word)
+    return NON_WORD_RE.sub('', word)
+
+
+def normalize_key(text):
+    """Normalized lookup key: case-folded, possessive-free, punctuation-free"""
+    text = POSSESSIVE_RE.sub('', text.strip())
+    text = NON_WORD_RE.sub(' ', text)
+    return WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+
+def load_alias_table(path):
+    """Load an alias table from a JSON file of {"Canonical": ["alias", ...]}"""
+    if not path:
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load entity alias table {path}: {e}")
+        return {}
+
+
+class _TrieNode:
+    __slots__ = ('children', 'key', 'best')
+
+    def __init__(self):
+        self.children = {}
+        self.key = None   # normalized key ending at this node, if any
+        self.best = None  # longest key below this node, or _AMBIGUOUS
+
+
+class EntityCanonicalizer:
+    """Collapses entity mentions onto canonical entities.
+
+    Mentions are grouped by a normalized key in a hash index, alias tables
+    map alternative names onto a canonical name, and a token trie merges a
+    span into its longest extension when that extension is unambiguous.
+    All stages are linear in the number of mention tokens.
+    """
+
+    def __init__(self, aliases=None, merge_prefixes=True):
+        self.merge_prefixes = merge_prefixes
+        self.alias_index = {}
+        # Canonical names from the alias table are never merged into longer spans
+        self.pinned_keys = set()
+        for canonical, alias_list in (aliases or {}).items():
+            canonical_key = normalize_key(canonical)
+            self.alias_index[canonical_key] = canonical
+            self.pinned_keys.add(canonical_key)
+            for alias in alias_list:
+                self.alias_index[normalize_key(alias)] = canonical
+
+    def canonicalize(self, mentions):
+        """Group raw mention strings into canonical entities.
+
+        Returns a list of {"text", "mentions", "aliases"} dicts, most
+        frequently mentioned first (ties keep first-seen order).
+        """
+        counts = Counter()
+        surface_forms = {}
+        order = {}
+
+        for mention in mentions:
+            # The key is derived from the stored surface form, so every form
+            # normalizes back to the key it is filed under
+            surface = POSSESSIVE_RE.sub('', mention.strip())
+            key = normalize_key(surface)
+            if not key:
+                continue
+            canonical = self.alias_index.get(key)
+            if canonical is not None:
+                key = normalize_key(canonical)
+            counts[key] += 1
+            surface_forms.setdefault(key, Counter())[surface] += 1
+            order.setdefault(key, len(order))
+
+        merged_into = self._prefix_merges(counts) if self.merge_prefixes else {}
+
+        merged_counts = Counter()
+        merged_forms = {}
+        for key, count in counts.items():
+            target = merged_into.get(key, key)
+            merged_counts[target] += count
+            merged_forms.setdefault(target, Counter()).update(surface_forms[key])
+
+        entities = []
+        for key in sorted(merged_counts, key=lambda k: (-merged_counts[k], order[k])):
+            forms = merged_forms[key]
+            entities.append({
+                "text": self._display_form(key, forms),
+                "mentions": merged_counts[key],
+                "aliases": sorted(f for f in forms if f and normalize_key(f) != key)
+            })
+        return entities
+
+    def _display_form(self, key, forms):
+        """Alias-table name if there is one, else the most common full-length surface form"""
+        canonical = self.alias_index.get(key)
+        if canonical is not None:
+            return canonical
+        full_forms = [item for item in forms.items() if normalize_key(item[0]) == key]
+        candidates = full_forms or list(forms.items())
+        if not candidates:
+            return key
+        return max(candidates, key=lambda item: (item[1], item[0].istitle()))[0]
+
+    def _prefix_merges(self, counts):
+        """Map each key that is a token prefix of exactly one longer key onto it (alias-table names excluded)"""
+        root = _TrieNode()
+        for key in counts:
+            node = root
+            for token in key.split(' '):
+                node = node.children.setdefault(token, _TrieNode())
+            node.key = key
+
+        # Post-order walk (iterative, to avoid recursion limits) computing the
+        # longest key below each node; branching into two spans is ambiguous
+        stack = [(root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+                continue
+            below = [child.best for child in node.children.values()]
+            if any(b is _AMBIGUOUS for b in below) or len(below) > 1:
+                node.best = _AMBIGUOUS
+            elif below:
+                node.best = below[0]
+            else:
+                node.best = node.key
+
+        merges = {}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if (node.key is not None and node.key not in self.pinned_keys
+                    and node.best is not _AMBIGUOUS and node.best != node.key):
+                merges[node.key] = node.best
+            stack.extend(node.children.values())
+        return merges
+
+
+def canonicalizer_from_env():
+    """Build a canonicalizer using the alias table named by KG_ENTITY_ALIASES"""
+    return EntityCanonicalizer(aliases=load_alias_table(os.environ.get('KG_ENTITY_ALIASES')))
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Entity and relation extractor backends for the Knowledge Graph Extractor
+The heuristic extractor needs only the standard library; the spaCy extractor
+is used when spaCy and a model are installed and falls back otherwise
+
+Usage:
+    python extractors.py --bench [pdf_or_text_file]
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from itertools import combinations
+
+from canonicalize import canonicalizer_from_env, clean_mention, normalize_key
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTITIES = 20
+MAX_RELATIONS = 100
+
+STOP_WORDS = {'the', 'and', 'but', 'for', 'are', 'this', 'that', 'with', 'have', 'will', 'you', 'they', 'been', 'their', 'said', 'each', 'which', 'she', 'how', 'its', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'may', 'put', 'say', 'too', 'use'}
+
+
+class HeuristicExtractor:
+    """Capitalized-word entities with pairwise relations between the top entities"""
+    name = 'heuristic'
+    active_name = name
+
+    def __init__(self, canonicalizer=None):
+        self.canonicalizer = canonicalizer or canonicalizer_from_env()
+
+    def extract(self, text):
+        """Extract entities and relationships from text using simple pattern matching"""
+        entities = []
+        relations = []
+
+        # Extract capitalized words as potential entities
+        capitalized_words = []
+        for word in text.split():
+            # Clean word of punctuation and possessives
+            clean_word = clean_mention(word)
+            if clean_word and clean_word[0].isupper() and len(clean_word) > 2:
+                # Skip common words
+                if clean_word.lower() not in STOP_WORDS:
+                    capitalized_words.append(clean_word)
+
+        # Merge case/possessive variants and aliases, most mentioned first
+        canonical_entities = self.canonicalizer.canonicalize(capitalized_words)
+        for entity in canonical_entities[:MAX_ENTITIES]:
+            word = entity["text"]
+            entity_type = self.guess_entity_type(word)
+            entities.append({
+                "text": word,
+                "label": entity_type,
+                "start": 0,
+                "end": len(word),
+                "description": f"Detected {entity_type.lower()}",
+                "mentions": entity["mentions"],
+                "aliases": entity["aliases"]
+            })
+
+        # Create simple relationships between entities
+        for i in range(min(len(entities), 10)):
+            for j in range(i + 1, min(len(entities), 10)):
+                relations.append({
+                    "source": entities[i]["text"],
+                    "target": entities[j]["text"],
+                    "relation": "related_to",
+                    "sentence": f"{entities[i]['text']} is related to {entities[j]['text']}"
+                })
+
+        return {"entities": entities, "relations": relations}
+
+    def extract_many(self, texts):
+        """Extract from several chapters, yielding one result per text in order"""
+        for text in texts:
+            yield self.extract(text)
+
+    @staticmethod
+    def guess_entity_type(word):
+        """Simple heuristic to guess entity type"""
+        # Common patterns for different entity types
+        if any(suffix in word.lower() for suffix in ['corp', 'inc', 'ltd', 'llc', 'company', 'group']):
+            return 'ORG'
+        elif any(title in word.lower() for title in ['dr', 'prof', 'mr', 'ms', 'mrs']):
+            return 'PERSON'
+        elif word.lower() in ['usa', 'america', 'china', 'japan', 'germany', 'france', 'uk', 'canada']:
+            return 'GPE'
+        elif len(word) > 8:  # Longer words might be concepts
+            return 'CONCEPT'
+        else:
+            return 'PERSON'  # Default to person
+
+
+# One spaCy model per worker process, loaded on first use
+_spacy_models = {}
+_spacy_lock = threading.Lock()
+
+
+def spacy_installed():
+    return importlib.util.find_spec('spacy') is not None
+
+
+def load_spacy_model(model_name):
+    """Load (once) a spaCy pipeline with only the components NER needs enabled"""
+    with _spacy_lock:
+        if model_name not in _spacy_models:
+            import spacy
+            started = time.perf_counter()
+            nlp = spacy.load(model_name, exclude=['lemmatizer', 'textcat', 'textcat_multilabel'])
+            # The parser is only needed for sentence boundaries; the sentencizer is far cheaper
+            for component in ('parser', 'tagger', 'morphologizer', 'attribute_ruler', 'senter'):
+                if component in nlp.pipe_names:
+                    nlp.disable_pipe(component)
+            if 'sentencizer' not in nlp.pipe_names:
+                nlp.add_pipe('sentencizer', first=True)
+            _spacy_models[model_name] = nlp
+            logger.info(f"Loaded spaCy model {model_name} in {time.perf_counter() - started:.1f}s "
+                        f"(active: {', '.join(nlp.pipe_names)})")
+        return _spacy_models[model_name]
+
+
+class SpacyExtractor:
+    """Named entities from spaCy NER with same-sentence co-occurrence relations.
+
+    Chapters are split into chunks below the model's max_length and streamed
+    through nlp.pipe in batches. If spaCy or the model cannot be loaded the
+    extractor permanently falls back to the heuristic extractor.
+    """
+    name = 'spacy'
+
+    # Numeric and temporal labels make poor graph nodes
+    IGNORED_LABELS = {'CARDINAL', 'ORDINAL', 'QUANTITY', 'PERCENT', 'MONEY', 'DATE', 'TIME'}
+    CHUNK_CHARS = 100000
+
+    def __init__(self, model_name='en_core_web_sm', batch_size=32, canonicalizer=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.canonicalizer = canonicalizer or canonicalizer_from_env()
+        self.fallback = HeuristicExtractor(self.canonicalizer)
+        self.failed = False
+
+    @property
+    def active_name(self):
+        return self.fallback.name if self.failed else self.name
+
+    def _nlp(self):
+        if self.failed:
+            return None
+        try:
+            return load_spacy_model(self.model_name)
+        except Exception as e:
+            logger.warning(f"spaCy model {self.model_name} unavailable, using heuristic extractor: {e}")
+            self.failed = True
+            return None
+
+    def _chunks(self, text):
+        """Split text into pieces spaCy will accept, on a line break or else a space"""
+        start = 0
+        while start < len(text):
+            end = start + self.CHUNK_CHARS
+            if end < len(text):
+                cut = text.rfind('\n', start, end)
+                if cut <= start:
+                    cut = max(text.rfind(' ', start, end), text.rfind('\t', start, end))
+                # Only a window with no whitespace at all is split mid-token
+                if cut > start:
+                    end = cut + 1
+            yield text[start:end]
+            start = end
+
+    def extract(self, text):
+        return next(iter(self.extract_many([text])))
+
+    def extract_many(self, texts):
+        """Stream chapters through nlp.pipe, yielding one result per text in order"""
+        nlp = self._nlp()
+        if nlp is None:
+            yield from self.fallback.extract_many(texts)
+            return
+
+        def tagged_chunks():
+            for index, text in enumerate(texts):
+                for chunk in self._chunks(text):
+                    yield chunk, index
+                yield '', index  # marks the end of a chapter, even an empty one
+
+        current, docs = None, []
+        for doc, index in nlp.pipe(tagged_chunks(), as_tuples=True, batch_size=self.batch_size):
+            if current is not None and index != current:
+                yield self._build_result(docs)
+                docs = []
+            current = index
+            if len(doc):
+                docs.append(doc)
+        if current is not None:
+            yield self._build_result(docs)
+
+    def _build_result(self, docs):
+        mentions = []
+        label_votes = {}
+        sentences = []
+        for doc in docs:
+            for sent in doc.sents:
+                sent_keys = []
+                for ent in sent.ents:
+                    if ent.label_ in self.IGNORED_LABELS or len(ent.text.strip()) < 2:
+                        continue
+                    mentions.append(ent.text)
+                    key = normalize_key(ent.text)
+                    label_votes.setdefault(key, Counter())[ent.label_] += 1
+                    sent_keys.append(key)
+                if len(set(sent_keys)) > 1:
+                    sentences.append((sent_keys, sent.text.strip()))
+
+        canonical_entities = self.canonicalizer.canonicalize(mentions)[:MAX_ENTITIES]
+        # Map every surface key (including merged aliases) onto its canonical entity
+        key_to_text = {}
+        entities = []
+        for entity in canonical_entities:
+            keys = [normalize_key(entity["text"])] + [normalize_key(a) for a in entity["aliases"]]
+            votes = Counter()
+            for key in keys:
+                key_to_text[key] = entity["text"]
+                votes.update(label_votes.get(key, {}))
+            label = votes.most_common(1)[0][0] if votes else 'CONCEPT'
+            entities.append({
+                "text": entity["text"],
+                "label": label,
+                "start": 0,
+                "end": len(entity["text"]),
+                "description": f"Detected {label.lower()}",
+                "mentions": entity["mentions"],
+                "aliases": entity["aliases"]
+            })
+
+        relations = []
+        seen_pairs = set()
+        for sent_keys, sentence in sentences:
+            names = sorted({key_to_text[k] for k in sent_keys if k in key_to_text})
+            for source, target in combinations(names, 2):
+                if (source, target) in seen_pairs:
+                    continue
+                seen_pairs.add((source, target))
+                relations.append({
+                    "source": source,
+                    "target": target,
+                    "relation": "related_to",
+                    "sentence": sentence[:300]
+                })
+                if len(relations) >= MAX_RELATIONS:
+                    return {"entities": entities, "relations": relations}
+
+        return {"entities": entities, "relations": relations}
+
+
+def get_extractor(name=None):
+    """Extractor selected by name or KG_EXTRACTOR: 'auto' (default), 'spacy' or 'heuristic'"""
+    name = (name or os.environ.get('KG_EXTRACTOR', 'auto')).lower()
+    if name == 'heuristic':
+        return HeuristicExtractor()
+    if name == 'spacy' or (name == 'auto' and spacy_installed()):
+        return SpacyExtractor(
+            model_name=os.environ.get('KG_SPACY_MODEL', 'en_core_web_sm'),
+            batch_size=int(os.environ.get('KG_SPACY_BATCH_SIZE', '32'))
+        )
+    return HeuristicExtractor()
+
+
+def benchmark(extractor, texts, repeat=3):
+    """Characters per second for extract_many over texts (best of `repeat`)"""
+    total_chars = sum(len(t) for t in texts)
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in extractor.extract_many(texts):
+            pass
+        best = min(best, time.perf_counter() - started)
+    return total_chars / best if best else float('inf')
+
+
+def main():
+    """Report extraction throughput for each available backend"""
+    parser = argparse.ArgumentParser(description="Knowledge Graph Extractor backend benchmark")
+    parser.add_argument('--bench', action='store_true', required=True)
+    parser.add_argument('source', nargs='?', help="text file to use as chapter content")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.source:
+        with open(args.source, 'r', encoding='utf-8', errors='ignore') as f:
+            text = f.read()
+    else:
+        text = ("Martin Kleppmann describes how LinkedIn built Kafka. "
+                "Google and Amazon run Bigtable and DynamoDB in data centers in the USA. ") * 2000
+    # Benchmark on chapter-sized pieces
+    texts = [text[i:i + 50000] for i in range(0, len(text), 50000)]
+
+    print(f"📊 Benchmarking on {len(texts)} chapters, {sum(len(t) for t in texts):,} characters")
+    backends = [HeuristicExtractor()]
+    if spacy_installed():
+        spacy_extractor = SpacyExtractor(model_name=os.environ.get('KG_SPACY_MODEL', 'en_core_web_sm'))
+        spacy_extractor.extract('Warm up the model.')
+        if not spacy_extractor.failed:
+            backends.append(spacy_extractor)
+        else:
+            print(f"⚠️  spaCy model {spacy_extractor.model_name} could not be loaded; skipping the spaCy backend")
+    else:
+        print("⚠️  spaCy is not installed; skipping the spaCy backend")
+
+    for extractor in backends:
+        rate = benchmark(extractor, texts)
+        print(f"✅ {extractor.name:<10} {rate / 1000:,.0f}K chars/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Server-side subgraph queries for processed documents
+Builds an adjacency index once per document so k-hop neighborhoods,
+shortest paths and filtered views can be answered without shipping the
+whole graph to the browser
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+
+from canonicalize import normalize_key
+
+MAX_HOPS = 5
+DEFAULT_NODE_LIMIT = 500
+
+
+class EntityNotFound(KeyError):
+    """The requested entity is not in the document graph"""
+
+
+class GraphIndex:
+    """Adjacency index over one knowledge graph (a chapter or a whole document)"""
+
+    def __init__(self):
+        self.nodes = {}
+        self.adjacency = {}
+        self.edges = {}
+        self.keys = {}
+        self._type_weight = {}
+
+    def add_graph(self, knowledge_graph):
+        """Merge a {"nodes", "edges"} graph into the index.
+
+        A node seen in several graphs gets the sum of its mentions and the
+        union of its aliases; type and description come from the graph in
+        which it is mentioned most.
+        """
+        for node in knowledge_graph.get("nodes", []):
+            node_id = node["id"]
+            mentions = node.get("mentions", 1)
+            existing = self.nodes.get(node_id)
+            if existing is None:
+                self.nodes[node_id] = dict(node, aliases=list(node.get("aliases", [])))
+                self.adjacency[node_id] = set()
+                self.keys.setdefault(normalize_key(str(node_id)), node_id)
+                self._type_weight[node_id] = mentions
+                continue
+            existing["mentions"] = existing.get("mentions", 1) + mentions
+            existing["aliases"] = sorted(set(existing["aliases"]) | set(node.get("aliases", [])))
+            if mentions > self._type_weight[node_id]:
+                self._type_weight[node_id] = mentions
+                existing["type"] = node.get("type", existing.get("type"))
+                existing["description"] = node.get("description", existing.get("description"))
+        for edge in knowledge_graph.get("edges", []):
+            source, target = edge["source"], edge["target"]
+            if source not in self.nodes or target not in self.nodes or source == target:
+                continue
+            self.adjacency[source].add(target)
+            self.adjacency[target].add(source)
+            self.edges.setdefault(self._edge_key(source, target), edge)
+
+    @staticmethod
+    def _edge_key(a, b):
+        return (a, b) if a <= b else (b, a)
+
+    def degree(self, node_id):
+        return len(self.adjacency[node_id])
+
+    def resolve(self, entity):
+        """Find a node by exact id, falling back to its normalized form"""
+        if entity in self.nodes:
+            return entity
+        node_id = self.keys.get(normalize_key(entity))
+        if node_id is None:
+            raise EntityNotFound(entity)
+        return node_id
+
+    def _matches(self, node_id, types, min_degree):
+        if types and self.nodes[node_id].get("type") not in types:
+            return False
+        return self.degree(node_id) >= min_degree
+
+    def subgraph(self, node_ids):
+        """Graph payload (same shape as a chapter knowledge_graph) induced by node_ids"""
+        node_ids = set(node_ids)
+        nodes = [dict(self.nodes[n], degree=self.degree(n)) for n in node_ids]
+        edges = []
+        for n in node_ids:
+            for m in self.adjacency[n]:
+                if m in node_ids and n <= m:
+                    edges.append(self.edges[self._edge_key(n, m)])
+        count = len(nodes)
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "stats": {
+                "total_nodes": count,
+                "total_edges": len(edges),
+                "density": 2 * len(edges) / (count * (count - 1)) if count > 1 else 0
+            }
+        }
+
+    def neighborhood(self, entity, hops=1, types=None, min_degree=0, limit=DEFAULT_NODE_LIMIT):
+        """Nodes within `hops` edges of entity, filtered by type and degree.
+
+        Filters apply to the returned neighbors, not to traversal, and the
+        center entity is always included. The result is the subgraph induced
+        by the kept nodes, so edges that ran through filtered-out nodes are
+        dropped; "filtered_out" counts the nodes that were reached but
+        excluded.
+        """
+        center = self.resolve(entity)
+        hops = max(0, min(hops, MAX_HOPS))
+        seen = {center}
+        selected = [center]
+        filtered_out = 0
+        frontier = deque([(center, 0)])
+        while frontier and len(selected) < limit:
+            node_id, depth = frontier.popleft()
+            if depth == hops:
+                continue
+            for neighbor in self.adjacency[node_id]:
+                if neighbor in seen:
+                    continue
+                seen.add(neighbor)
+                frontier.append((neighbor, depth + 1))
+                if self._matches(neighbor, types, min_degree):
+                    selected.append(neighbor)
+                    if len(selected) >= limit:
+                        break
+                else:
+                    filtered_out += 1
+        result = self.subgraph(selected)
+        result["center"] = center
+        result["filtered_out"] = filtered_out
+        return result
+
+    def shortest_path(self, source, target):
+        """Unweighted shortest path between two entities (BFS); None if disconnected"""
+        start, goal = self.resolve(source), self.resolve(target)
+        parents = {start: None}
+        queue = deque([start])
+        while queue:
+            node_id = queue.popleft()
+            if node_id == goal:
+                path = []
+                while node_id is not None:
+                    path.append(node_id)
+                    node_id = parents[node_id]
+                path.reverse()
+                result = self.subgraph(path)
+                result["path"] = path
+                return result
+            for neighbor in self.adjacency[node_id]:
+                if neighbor not in parents:
+                    parents[neighbor] = node_id
+                    queue.append(neighbor)
+        return None
+
+    def filtered(self, types=None, min_degree=0, limit=DEFAULT_NODE_LIMIT):
+        """Nodes matching type/degree filters, highest degree first"""
+        matching = [n for n in self.nodes if self._matches(n, types, min_degree)]
+        matching.sort(key=self.degree, reverse=True)
+        return self.subgraph(matching[:limit])
+
+
+class DocumentGraph:
+    """Per-chapter indexes plus a merged index for one processed document"""
+
+    def __init__(self, result_data):
+        self.chapters = {}
+        self.merged = GraphIndex()
+        for chapter in result_data.get("chapters", []):
+            graph = chapter.get("knowledge_graph") or {}
+            index = GraphIndex()
+            index.add_graph(graph)
+            self.chapters[chapter["id"]] = index
+            self.merged.add_graph(graph)
+
+    def index(self, chapter_id=None):
+        """Index for one chapter, or the merged document graph"""
+        if chapter_id is None:
+            return self.merged
+        if chapter_id not in self.chapters:
+            raise EntityNotFound(f"chapter {chapter_id}")
+        return self.chapters[chapter_id]
+
+
+class GraphIndexCache:
+    """LRU of DocumentGraph indexes keyed by result file, rebuilt if the file changes"""
+
+    def __init__(self, max_documents=16):
+        self.max_documents = max_documents
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, result_path):
+        mtime = os.path.getmtime(result_path)
+        with self._lock:
+            entry = self._entries.get(result_path)
+            if entry and entry[0] == mtime:
+                self._entries.move_to_end(result_path)
+                return entry[1]
+
+        with open(result_path, 'r', encoding='utf-8') as f:
+            document = DocumentGraph(json.load(f))
+
+        with self._lock:
+            self._entries[result_path] = (mtime, document)
+            self._entries.move_to_end(result_path)
+            while len(self._entries) > self.max_documents:
+                self._entries.popitem(last=False)
+        return document
@@ -0,0 +1,266 @@
+"""
+Page-level text cache for PDF extraction
+Extracted page text is stored in SQLite keyed by a hash of the page's content
+stream, so revised editions of a document only re-extract changed pages
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction output changes so stale text is not reused
+CACHE_VERSION = b'1'
+
+
+class PageCacheStats:
+    """Hit/miss counters for one document.
+
+    Pages that could not be hashed are extracted without the cache; they count
+    as misses and are also tallied in `uncacheable`.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self):
+        return {"hits": self.hits, "misses": self.misses, "uncacheable": self.uncacheable,
+                "hit_rate": round(self.hit_rate, 4)}
+
+
+def _ref_key(container, name):
+    """(idnum, generation) of an indirect entry, None for a direct object"""
+    ref = container.raw_get(name)
+    return (ref.idnum, ref.generation) if hasattr(ref, 'idnum') else None
+
+
+def _hash_font(digest, font):
+    digest.update(f"{font.get('/BaseFont')}".encode('utf-8'))
+    encoding = font.get('/Encoding')
+    if encoding is not None:
+        encoding = encoding.get_object()
+        if hasattr(encoding, 'keys'):
+            # Only the base encoding and differences array change the glyph names
+            differences = encoding.get('/Differences')
+            differences = differences.get_object() if differences is not None else []
+            encoding = (encoding.get('/BaseEncoding'), [d.get_object() for d in differences])
+        digest.update(repr(encoding).encode('utf-8'))
+    to_unicode = font.get('/ToUnicode')
+    if to_unicode is not None:
+        digest.update(to_unicode.get_object().get_data())
+
+
+def _hash_resources(digest, resources, seen):
+    """Fold the fonts and form XObjects that text extraction reads into digest"""
+    resources = resources.get_object() if resources is not None else {}
+    fonts = resources.get('/Font')
+    fonts = fonts.get_object() if fonts is not None else {}
+    for name in sorted(fonts):
+        digest.update(f"font {name}".encode('utf-8'))
+        _hash_font(digest, fonts[name].get_object())
+
+    xobjects = resources.get('/XObject')
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+    for name in sorted(xobjects):
+        xobject = xobjects[name].get_object()
+        subtype = xobject.get('/Subtype')
+        digest.update(f"xobject {name}={subtype}".encode('utf-8'))
+        # Images carry no text; forms are drawn by `Do` and extracted like page content
+        if subtype != '/Form':
+            continue
+        ref = _ref_key(xobjects, name)
+        if ref is not None:
+            # Object numbers differ between editions, so mark repeats by visit order
+            if ref in seen:
+                digest.update(f"seen {seen[ref]}".encode('utf-8'))
+                continue
+            seen[ref] = len(seen)
+        digest.update(xobject.get_data())
+        _hash_resources(digest, xobject.get('/Resources'), seen)
+
+
+def page_hash(page):
+    """Hash of everything a PyPDF2 page's text depends on, or None.
+
+    Covers the content streams, the fonts they use (base font, encoding and
+    ToUnicode map) and, recursively, the form XObjects drawn with `Do`.
+    """
+    try:
+        contents = page.get_contents()
+        digest = hashlib.sha256(CACHE_VERSION)
+        # /Contents may be one stream, an array of streams drawn in order, or absent
+        if contents is None:
+            streams = []
+        elif isinstance(contents, list):
+            streams = contents
+        else:
+            streams = [contents]
+        for stream in streams:
+            digest.update(stream.get_object().get_data())
+        _hash_resources(digest, page.get('/Resources'), {})
+        return digest.hexdigest()
+    except Exception as e:
+        logger.debug(f"Could not hash page contents: {e}")
+        return None
+
+
+class PageTextCache:
+    """SQLite-backed page text store with byte-bounded LRU eviction.
+
+    The database may be shared by several worker processes. The byte total
+    lives in a one-row meta table that is updated in the same transaction as
+    the pages, so the bound holds across processes without rescanning the
+    table. Newly extracted pages and hits are buffered in memory and written
+    in one transaction by flush(), called once per document and whenever the
+    buffer passes `batch_bytes`.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, batch_bytes=1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.batch_bytes = batch_bytes
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._pending = {}
+        self._pending_bytes = 0
+        # Autocommit mode: write transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' hash TEXT PRIMARY KEY, text TEXT NOT NULL,'
+            ' size INTEGER NOT NULL, last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self._conn.execute('DROP INDEX IF EXISTS pages_last_used')
+        # Lets the LRU scan read sizes without touching page text
+        self._conn.execute('CREATE INDEX IF NOT EXISTS pages_lru ON pages (last_used, size)')
+        # Databases written before the meta table existed get their total computed once
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta (key, value)"
+            " SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM pages"
+        )
+
+    def get(self, key):
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key][0]
+            row = self._conn.execute('SELECT text FROM pages WHERE hash = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            return row[0]
+
+    def put(self, key, text):
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key not in self._pending:
+                self._pending[key] = (text, size)
+                self._pending_bytes += size
+            if self._pending_bytes >= self.batch_bytes:
+                self._write()
+
+    def flush(self):
+        """Write buffered pages and last_used updates in one transaction"""
+        with self._lock:
+            if self._pending or self._touched:
+                self._write()
+
+    def _write(self):
+        """Apply the buffers in one write transaction.
+
+        A busy or failing database only costs the cache write, never the page.
+        """
+        try:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    'UPDATE pages SET last_used = ? WHERE hash = ?',
+                    [(used, key) for key, used in self._touched.items()]
+                )
+                added = 0
+                now = time.time()
+                for key, (text, size) in self._pending.items():
+                    # Another worker may have stored the same page meanwhile
+                    cursor = self._conn.execute(
+                        'INSERT OR IGNORE INTO pages (hash, text, size, last_used) VALUES (?, ?, ?, ?)',
+                        (key, text, size, now)
+                    )
+                    added += size * cursor.rowcount
+                self._conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total_bytes'", (added,))
+                self._evict()
+                self._conn.execute('COMMIT')
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Page text cache write failed: {e}")
+        finally:
+            # Buffered pages are only an optimization; drop them rather than retry
+            self._touched.clear()
+            self._pending.clear()
+            self._pending_bytes = 0
+
+    def _evict(self):
+        """Drop least recently used pages until the cache fits in max_bytes"""
+        total = self._conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        doomed, freed = [], 0
+        for key, size in self._conn.execute('SELECT hash, size FROM pages ORDER BY last_used'):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany('DELETE FROM pages WHERE hash = ?', doomed)
+        self._conn.execute("UPDATE meta SET value = value - ? WHERE key = 'total_bytes'", (freed,))
+
+    def extract(self, page, stats=None):
+        """Text of a PyPDF2 page, reusing cached text for unchanged content"""
+        key = page_hash(page)
+        if key is not None:
+            text = self.get(key)
+            if text is not None:
+                if stats is not None:
+                    stats.hits += 1
+                return text
+        text = page.extract_text()
+        if stats is not None:
+            stats.misses += 1
+            if key is None:
+                stats.uncacheable += 1
+        if key is not None:
+            self.put(key, text)
+        return text
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+def page_cache_from_env():
+    """PageTextCache at KG_PAGE_CACHE_PATH (None when set to an empty string)"""
+    path = os.environ.get('KG_PAGE_CACHE_PATH', 'page_cache.sqlite3')
+    if not path:
+        return None
+    try:
+        return PageTextCache(path, max_bytes=int(os.environ.get('KG_PAGE_CACHE_MAX_MB', '256')) * 1024 * 1024)
+    except sqlite3.Error as e:
+        logger.warning(f"Page text cache disabled, could not open {path}: {e}")
+        return None
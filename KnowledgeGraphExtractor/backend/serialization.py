@@ -0,0 +1,40 @@
+"""
+JSON serialization for API responses and result files
+Uses orjson when it is installed and falls back to a compact stdlib encoding
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_MIMETYPE = 'application/json'
+
+
+def dumps(data):
+    """Encode data as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # e.g. integers wider than 64 bits or non-str keys; the stdlib copes
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_json(path, data):
+    """Encode data once, write it atomically to path and return the bytes"""
+    payload = dumps(data)
+    tmp_path = path + '.part'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return payload
+
+
+def encoder_name():
+    """Which encoder dumps() uses, reported by /api/health"""
+    return 'orjson' if orjson is not None else 'json'
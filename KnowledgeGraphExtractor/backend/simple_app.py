@@ -4,15 +4,22 @@ Simple Knowledge Graph Extractor Backend
 Works without external dependencies using only Python standard library
 """
 
-import json
 import os
 import uuid
 import re
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import cgi
 import tempfile
+from canonicalize import canonicalizer_from_env
+from admission import admission_from_env
+from serialization import JSON_MIMETYPE, dumps, encoder_name, write_json
+from storage import storage_from_env
+
+# Shared across handler instances (one is created per request)
+admission = admission_from_env()
+storage = storage_from_env("uploads", "processed")
 
 class SimpleKnowledgeGraphExtractor:
     def __init__(self):
@@ -20,6 +27,7 @@ class SimpleKnowledgeGraphExtractor:
         self.processed_folder = "processed"
         os.makedirs(self.upload_folder, exist_ok=True)
         os.makedirs(self.processed_folder, exist_ok=True)
+        self.canonicalizer = canonicalizer_from_env()
     
     def extract_text_from_pdf_simple(self, pdf_path):
         """Simple PDF text extraction - returns mock data for demo"""
@@ -77,16 +85,19 @@ class SimpleKnowledgeGraphExtractor:
         # Extract capitalized words as entities
         words = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text)
         
-        # Filter common words and create entities
+        # Filter common words, then merge variants and sub-spans ("John" -> "John Smith")
         common_words = {'The', 'This', 'That', 'Chapter', 'Introduction', 'Methodology', 'Results'}
-        unique_entities = list(set([w for w in words if w not in common_words and len(w) > 2]))
+        mentions = [w for w in words if w not in common_words and len(w) > 2]
+        canonical_entities = self.canonicalizer.canonicalize(mentions)
         
-        for i, entity in enumerate(unique_entities[:15]):  # Limit to 15 entities
-            entity_type = self.guess_entity_type(entity)
+        for i, entity in enumerate(canonical_entities[:15]):  # Limit to 15 entities
+            entity_type = self.guess_entity_type(entity["text"])
             entities.append({
-                "text": entity,
+                "text": entity["text"],
                 "label": entity_type,
                 "description": f"Detected {entity_type.lower()}",
+                "mentions": entity["mentions"],
+                "aliases": entity["aliases"],
                 "size": 15 + (i % 10)
             })
         
@@ -134,6 +145,8 @@ class SimpleKnowledgeGraphExtractor:
                 "label": entity["text"],
                 "type": entity["label"],
                 "description": entity["description"],
+                "mentions": entity["mentions"],
+                "aliases": entity["aliases"],
                 "size": entity["size"]
             })
         
@@ -207,6 +220,19 @@ class RequestHandler(BaseHTTPRequestHandler):
             self.send_json_response({
                 "status": "healthy",
                 "spacy_available": False,
+                "json_encoder": encoder_name(),
+                "timestamp": datetime.now().isoformat()
+            })
+        elif parsed_path.path.startswith('/api/files/'):
+            file_id = parsed_path.path[len('/api/files/'):]
+            result_path = storage.find_result(file_id) if re.fullmatch(r'[\w-]+', file_id) else None
+            if result_path is None:
+                self.send_json_response({"error": "File not found"}, 404)
+            else:
+                self.send_json_file(result_path)
+        elif parsed_path.path == '/api/metrics':
+            self.send_json_response({
+                "admission": admission.snapshot(),
                 "timestamp": datetime.now().isoformat()
             })
         else:
@@ -218,7 +244,16 @@ class RequestHandler(BaseHTTPRequestHandler):
         parsed_path = urlparse(self.path)
         
         if parsed_path.path == '/api/upload':
-            self.handle_file_upload()
+            # Reject before reading the request body so turned-away uploads stay cheap
+            rejection = admission.try_acquire(self.client_address[0])
+            if rejection:
+                self.send_json_response(rejection.to_dict(), rejection.status_code,
+                                        {'Retry-After': str(rejection.retry_after)})
+                return
+            try:
+                self.handle_file_upload()
+            finally:
+                admission.release()
         else:
             self.send_response(404)
             self.end_headers()
@@ -252,22 +287,40 @@ class RequestHandler(BaseHTTPRequestHandler):
             # Clean up
             os.unlink(temp_file.name)
             
-            self.send_json_response(result)
+            # Encode once: the same bytes are saved and sent
+            payload = write_json(storage.result_path(file_id), result)
+            self.send_json_bytes(payload)
             
         except Exception as e:
             self.send_json_response({"error": f"Processing failed: {str(e)}"}, 500)
     
-    def send_json_response(self, data, status_code=200):
+    def send_json_response(self, data, status_code=200, extra_headers=None):
         """Send JSON response with CORS headers"""
+        self.send_json_bytes(dumps(data), status_code, extra_headers)
+    
+    def send_json_headers(self, content_length, status_code=200, extra_headers=None):
+        """Send status line and headers for a JSON body of content_length bytes"""
         self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', JSON_MIMETYPE)
+        self.send_header('Content-Length', str(content_length))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
-        
-        response = json.dumps(data, indent=2)
-        self.wfile.write(response.encode('utf-8'))
+    
+    def send_json_bytes(self, payload, status_code=200, extra_headers=None):
+        """Send already-encoded JSON"""
+        self.send_json_headers(len(payload), status_code, extra_headers)
+        self.wfile.write(payload)
+    
+    def send_json_file(self, path):
+        """Send an encoded JSON file straight from disk (zero-copy sendfile where available)"""
+        with open(path, 'rb') as f:
+            self.send_json_headers(os.fstat(f.fileno()).st_size)
+            self.wfile.flush()
+            self.connection.sendfile(f)
     
     def log_message(self, format, *args):
         """Custom log message"""
@@ -276,7 +329,7 @@ class RequestHandler(BaseHTTPRequestHandler):
 def main():
     """Start the simple server"""
     server_address = ('localhost', 5000)
-    httpd = HTTPServer(server_address, RequestHandler)
+    httpd = ThreadingHTTPServer(server_address, RequestHandler)
     
     print("🚀 Simple Knowledge Graph Extractor Backend")
     print("=" * 50)
@@ -285,11 +338,15 @@ def main():
     print("⚠️  Press Ctrl+C to stop the server")
     print()
     
+    # Results are persisted to processed/, so apply the same retention as app.py
+    storage.start_background_eviction(int(os.environ.get('KG_EVICTION_INTERVAL_SECONDS', '3600')))
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\n🛑 Server stopped")
         httpd.server_close()
+    finally:
+        storage.stop_background_eviction()
 
 if __name__ == "__main__":
     main()
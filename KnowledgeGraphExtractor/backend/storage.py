@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Storage manager for the Knowledge Graph Extractor
+Shards uploads/ and processed/ by file id prefix and evicts old results
+
+Usage:
+    python storage.py compact [--uploads DIR] [--processed DIR]
+"""
+
+import argparse
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RESULT_SUFFIX = '_result.json'
+PARTIAL_SUFFIX = '.part'
+# Stored files are named <file id>_...; file ids are uuid4 strings
+STORED_NAME_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}_')
+# Partial results older than this belong to jobs that died mid-write
+STALE_PARTIAL_SECONDS = 3600
+
+
+class StorageManager:
+    """Owns the on-disk layout of uploaded PDFs and processed results.
+
+    Files live under <folder>/<id[0:2]>/<id[2:4]>/ so no single directory
+    grows past a few thousand entries. Files from the old flat layout are
+    still found until `compact` moves them into their shard.
+    """
+
+    def __init__(self, upload_folder, processed_folder, delete_uploads=True,
+                 result_ttl_seconds=0, max_processed_bytes=0):
+        self.upload_folder = upload_folder
+        self.processed_folder = processed_folder
+        self.delete_uploads = delete_uploads
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_processed_bytes = max_processed_bytes
+        self._eviction_thread = None
+        self._stop = threading.Event()
+        os.makedirs(upload_folder, exist_ok=True)
+        os.makedirs(processed_folder, exist_ok=True)
+
+    @staticmethod
+    def shard_dir(folder, file_id):
+        """Directory holding files for file_id"""
+        return os.path.join(folder, file_id[:2], file_id[2:4])
+
+    def upload_path(self, file_id, filename):
+        """Where to save an uploaded PDF (creates the shard directory)"""
+        directory = self.shard_dir(self.upload_folder, file_id)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{file_id}_{filename}")
+
+    def result_path(self, file_id):
+        """Where to write the processed result for file_id (creates the shard directory)"""
+        directory = self.shard_dir(self.processed_folder, file_id)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{file_id}{RESULT_SUFFIX}")
+
+    def find_result(self, file_id):
+        """Path of an existing result for file_id, or None"""
+        sharded = os.path.join(self.shard_dir(self.processed_folder, file_id), f"{file_id}{RESULT_SUFFIX}")
+        if os.path.exists(sharded):
+            return sharded
+        legacy = os.path.join(self.processed_folder, f"{file_id}{RESULT_SUFFIX}")
+        if os.path.exists(legacy):
+            return legacy
+        return None
+
+    def discard_upload(self, path):
+        """Remove a source PDF after successful processing, if configured to"""
+        if not self.delete_uploads:
+            return
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not delete upload {path}: {e}")
+
+    @staticmethod
+    def is_stored_name(name):
+        """Whether name belongs to an upload or result (not e.g. .gitkeep)"""
+        return STORED_NAME_RE.match(name) is not None
+
+    def _iter_files(self, folder):
+        """Yield (path, stat) for every stored file below folder"""
+        stack = [folder]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and self.is_stored_name(entry.name):
+                            yield entry.path, entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+            return False
+
+    def evict(self, now=None):
+        """Apply TTL and size limits; returns the number of files removed.
+
+        Results and uploads older than the TTL are removed, then the oldest
+        results are removed until processed/ fits in max_processed_bytes.
+        """
+        now = now if now is not None else time.time()
+        removed = 0
+        results = []
+
+        for path, st in self._iter_files(self.processed_folder):
+            if self.result_ttl_seconds and now - st.st_mtime > self.result_ttl_seconds:
+                removed += self._remove(path)
+            elif not path.endswith(PARTIAL_SUFFIX):
+                results.append((st.st_mtime, st.st_size, path))
+
+        if self.result_ttl_seconds:
+            for path, st in self._iter_files(self.upload_folder):
+                if now - st.st_mtime > self.result_ttl_seconds:
+                    removed += self._remove(path)
+
+        if self.max_processed_bytes:
+            total = sum(size for _, size, _ in results)
+            results.sort()
+            for _, size, path in results:
+                if total <= self.max_processed_bytes:
+                    break
+                if self._remove(path):
+                    total -= size
+                    removed += 1
+
+        if removed:
+            logger.info(f"Evicted {removed} stored files")
+        return removed
+
+    def compact(self):
+        """Move flat-layout files into shards, drop stale partial results and empty shards, then evict"""
+        moved = 0
+        for folder in (self.upload_folder, self.processed_folder):
+            with os.scandir(folder) as entries:
+                flat_files = [entry for entry in entries if entry.is_file(follow_symlinks=False)]
+            for entry in flat_files:
+                # Only files named after a file id belong in a shard
+                if entry.name.endswith(PARTIAL_SUFFIX) or not self.is_stored_name(entry.name):
+                    continue
+                file_id = entry.name.split('_', 1)[0]
+                directory = self.shard_dir(folder, file_id)
+                os.makedirs(directory, exist_ok=True)
+                os.replace(entry.path, os.path.join(directory, entry.name))
+                moved += 1
+
+        now = time.time()
+        for path, st in list(self._iter_files(self.processed_folder)):
+            if path.endswith(PARTIAL_SUFFIX) and now - st.st_mtime > STALE_PARTIAL_SECONDS:
+                self._remove(path)
+
+        removed = self.evict(now)
+
+        for folder in (self.upload_folder, self.processed_folder):
+            for root, _, _ in os.walk(folder, topdown=False):
+                if root != folder and not os.listdir(root):
+                    try:
+                        os.rmdir(root)
+                    except OSError:
+                        pass
+
+        return {"moved": moved, "evicted": removed}
+
+    def start_background_eviction(self, interval_seconds):
+        """Run evict() every interval_seconds on a daemon thread"""
+        if not (self.result_ttl_seconds or self.max_processed_bytes):
+            return
+        if self._eviction_thread and self._eviction_thread.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.evict()
+                except Exception as e:
+                    logger.error(f"Background eviction failed: {e}")
+
+        self._eviction_thread = threading.Thread(target=run, name='storage-eviction', daemon=True)
+        self._eviction_thread.start()
+
+    def stop_background_eviction(self):
+        self._stop.set()
+
+
+def storage_from_env(upload_folder, processed_folder):
+    """Build a StorageManager from KG_* environment settings"""
+    return StorageManager(
+        upload_folder,
+        processed_folder,
+        delete_uploads=os.environ.get('KG_DELETE_UPLOADS_AFTER_PROCESSING', '1') == '1',
+        result_ttl_seconds=int(float(os.environ.get('KG_RESULT_TTL_HOURS', '0')) * 3600),
+        max_processed_bytes=int(os.environ.get('KG_PROCESSED_MAX_MB', '0')) * 1024 * 1024
+    )
+
+
+def main():
+    """One-shot storage maintenance"""
+    parser = argparse.ArgumentParser(description="Knowledge Graph Extractor storage maintenance")
+    parser.add_argument('command', choices=['compact'])
+    parser.add_argument('--uploads', default='uploads')
+    parser.add_argument('--processed', default='processed')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    storage = storage_from_env(args.uploads, args.processed)
+
+    print("🧹 Compacting storage...")
+    stats = storage.compact()
+    print(f"✅ Moved {stats['moved']} files into shards, evicted {stats['evicted']} files")
+
+
+if __name__ == "__main__":
+    main()
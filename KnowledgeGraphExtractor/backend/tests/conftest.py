@@ -0,0 +1,24 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# Tests import the backend modules the same way app.py does: from the backend directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """app.py imported inside a scratch directory (it creates uploads/ and processed/ on import)"""
+    workdir = tmp_path_factory.mktemp('backend')
+    previous = os.getcwd()
+    os.environ['KG_PAGE_CACHE_PATH'] = ''
+    os.chdir(workdir)
+    try:
+        module = importlib.import_module('app')
+    finally:
+        os.chdir(previous)
+    return module
@@ -0,0 +1,81 @@
+"""
+Minimal PDF writer for tests: text pages built from raw content streams
+"""
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def text_stream(lines):
+    """Content stream drawing each line of text with font /F1"""
+    ops = ['BT', '/F1 10 Tf', '12 TL', '50 780 Td']
+    for line in lines:
+        ops.append(f'({_escape(line)}) Tj T*')
+    ops.append('ET')
+    return '\n'.join(ops).encode('latin-1')
+
+
+def _stream(content, entries=b''):
+    return b'<< %s/Length %d >>\nstream\n' % (entries, len(content)) + content + b'\nendstream'
+
+
+def write_pdf(path, pages, forms=None):
+    """Write a PDF whose pages are a list of content-stream bytes.
+
+    A page given as a list of byte strings gets an array of content streams.
+
+    forms optionally gives each page a dict of form XObject name -> content
+    stream. A page's forms share its /XObject dictionary, so a form can draw
+    other forms or itself.
+    """
+    objects = {}
+    font_id = 3
+    objects[font_id] = b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
+    kids = []
+    next_id = 4
+    for n, content in enumerate(pages):
+        streams = content if isinstance(content, list) else [content]
+        content_ids = list(range(next_id, next_id + len(streams)))
+        page_id = next_id + len(streams)
+        next_id = page_id + 1
+        for content_id, stream in zip(content_ids, streams):
+            objects[content_id] = _stream(stream)
+        if isinstance(content, list):
+            contents = b'[%s]' % b' '.join(b'%d 0 R' % c for c in content_ids)
+        else:
+            contents = b'%d 0 R' % content_ids[0]
+        resources = b'/Font << /F1 %d 0 R >>' % font_id
+        page_forms = forms[n] if forms else None
+        if page_forms:
+            xobjects_id = next_id
+            next_id += 1
+            entries = []
+            for name, form_content in sorted(page_forms.items()):
+                objects[next_id] = _stream(form_content, (
+                    b'/Type /XObject /Subtype /Form /BBox [0 0 612 792] '
+                    b'/Resources << %s /XObject %d 0 R >> ' % (resources, xobjects_id)))
+                entries.append(b'/%s %d 0 R' % (name.encode('latin-1'), next_id))
+                next_id += 1
+            objects[xobjects_id] = b'<< %s >>' % b' '.join(entries)
+            resources += b' /XObject %d 0 R' % xobjects_id
+        objects[page_id] = (
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << %s >> /Contents %s >>' % (resources, contents)
+        )
+        kids.append(page_id)
+    objects[1] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objects[2] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % k for k in kids), len(kids))
+
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+        offsets = {}
+        for obj_id in sorted(objects):
+            offsets[obj_id] = f.tell()
+            f.write(b'%d 0 obj\n' % obj_id + objects[obj_id] + b'\nendobj\n')
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        for obj_id in sorted(objects):
+            f.write(b'%010d 00000 n \n' % offsets[obj_id])
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
@@ -0,0 +1,45 @@
+from admission import AdmissionController
+
+
+def test_rate_limit_rejects_with_retry_after():
+    controller = AdmissionController(max_concurrent=4, rate_per_minute=60, burst=2)
+    for _ in range(2):
+        assert controller.try_acquire('client') is None
+        controller.release()
+
+    rejection = controller.try_acquire('client')
+    assert rejection.status_code == 429
+    assert rejection.retry_after >= 1
+    # Other clients have their own bucket
+    assert controller.try_acquire('other') is None
+
+
+def test_busy_server_does_not_consume_rate_tokens():
+    controller = AdmissionController(max_concurrent=1, rate_per_minute=1, burst=2)
+    assert controller.try_acquire('holder') is None
+
+    for _ in range(5):
+        assert controller.try_acquire('client').status_code == 503
+
+    controller.release()
+    assert controller.try_acquire('client') is None
+    snapshot = controller.snapshot()
+    assert snapshot["rejected_overloaded"] == 5
+    assert snapshot["rejected_rate_limited"] == 0
+
+
+def test_rate_limited_rejection_frees_the_slot():
+    controller = AdmissionController(max_concurrent=1, rate_per_minute=1, burst=1)
+    assert controller.try_acquire('client') is None
+    controller.release()
+
+    assert controller.try_acquire('client').status_code == 429
+    assert controller.try_acquire('other') is None
+    assert controller.snapshot()["active_jobs"] == 1
+
+
+def test_zero_rate_disables_rate_limiting():
+    controller = AdmissionController(max_concurrent=1, rate_per_minute=0, burst=1)
+    for _ in range(10):
+        assert controller.try_acquire('client') is None
+        controller.release()
@@ -0,0 +1,51 @@
+from canonicalize import EntityCanonicalizer, clean_mention, normalize_key
+
+
+def by_text(entities):
+    return {e["text"]: e for e in entities}
+
+
+def test_case_and_possessive_variants_merge():
+    entities = EntityCanonicalizer().canonicalize(["Kafka", "Kafka's", "KAFKA", "Kafka"])
+    assert entities == [{"text": "Kafka", "mentions": 4, "aliases": []}]
+
+
+def test_double_possessive_does_not_fail():
+    entities = EntityCanonicalizer().canonicalize(["Kafka's's"])
+    assert len(entities) == 1
+    assert entities[0]["mentions"] == 1
+
+
+def test_prefix_merges_into_longest_span():
+    entities = EntityCanonicalizer().canonicalize(["John", "John Smith", "John"])
+    assert entities == [{"text": "John Smith", "mentions": 3, "aliases": ["John"]}]
+
+
+def test_ambiguous_prefix_is_not_merged():
+    entities = by_text(EntityCanonicalizer().canonicalize(["Google", "Google Cloud", "Google Maps"]))
+    assert set(entities) == {"Google", "Google Cloud", "Google Maps"}
+    assert all(e["mentions"] == 1 for e in entities.values())
+
+
+def test_alias_table_maps_onto_canonical_name():
+    canonicalizer = EntityCanonicalizer(aliases={"Kubernetes": ["k8s", "kube"]})
+    entities = canonicalizer.canonicalize(["k8s", "Kubernetes", "KUBE"])
+    assert entities == [{"text": "Kubernetes", "mentions": 3, "aliases": ["KUBE", "k8s"]}]
+
+
+def test_alias_canonical_name_is_not_merged_into_longer_span():
+    canonicalizer = EntityCanonicalizer(aliases={"Kafka": ["Apache Kafka"]})
+    entities = by_text(canonicalizer.canonicalize(["Apache Kafka", "Kafka Streams", "Kafka"]))
+    assert entities["Kafka"] == {"text": "Kafka", "mentions": 2, "aliases": ["Apache Kafka"]}
+    assert entities["Kafka Streams"]["mentions"] == 1
+
+
+def test_most_mentioned_first():
+    entities = EntityCanonicalizer().canonicalize(["Raft", "Paxos", "Paxos"])
+    assert [e["text"] for e in entities] == ["Paxos", "Raft"]
+
+
+def test_normalization_helpers():
+    assert normalize_key("  Kafka's ") == "kafka"
+    assert normalize_key("Kafka  Streams!") == "kafka streams"
+    assert clean_mention('"Kafka\'s,') == "Kafka"
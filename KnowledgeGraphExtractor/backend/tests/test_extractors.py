@@ -0,0 +1,57 @@
+import pytest
+
+from extractors import HeuristicExtractor, SpacyExtractor
+
+
+def test_chunks_split_on_whitespace_without_newlines():
+    extractor = SpacyExtractor()
+    extractor.CHUNK_CHARS = 20
+    text = "Kafka replicates logs and Google runs Bigtable " * 3
+    chunks = list(extractor._chunks(text))
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 20 for chunk in chunks)
+    assert all(chunk.endswith(" ") for chunk in chunks)
+
+
+def test_chunks_prefer_line_breaks():
+    extractor = SpacyExtractor()
+    extractor.CHUNK_CHARS = 20
+    chunks = list(extractor._chunks("first line\nsecond line that is long"))
+    assert chunks[0] == "first line\n"
+
+
+def test_heuristic_extract_many_matches_extract():
+    extractor = HeuristicExtractor()
+    texts = ["Kafka and Postgres store logs", "Zookeeper coordinates Kafka brokers"]
+    assert list(extractor.extract_many(texts)) == [extractor.extract(t) for t in texts]
+
+
+def test_spacy_extractor_batches_chapters(tmp_path):
+    spacy = pytest.importorskip('spacy')
+    # A blank pipeline with an entity ruler stands in for a trained model
+    nlp = spacy.blank('en')
+    ruler = nlp.add_pipe('entity_ruler')
+    ruler.add_patterns([{"label": "ORG", "pattern": "Google"}, {"label": "PRODUCT", "pattern": "Kafka"}])
+    nlp.to_disk(tmp_path / 'model')
+
+    extractor = SpacyExtractor(model_name=str(tmp_path / 'model'), batch_size=2)
+    extractor.CHUNK_CHARS = 30
+    results = list(extractor.extract_many([
+        "Google runs Kafka. Google likes Kafka.",
+        "",
+        "Nothing to see here.",
+    ]))
+
+    assert not extractor.failed
+    assert len(results) == 3
+    assert {e["text"]: e["label"] for e in results[0]["entities"]} == {"Google": "ORG", "Kafka": "PRODUCT"}
+    assert results[0]["relations"][0]["source"] == "Google"
+    assert results[1]["entities"] == [] and results[2]["entities"] == []
+
+
+def test_spacy_extractor_falls_back_when_model_missing():
+    extractor = SpacyExtractor(model_name='no_such_model_xyz')
+    result = extractor.extract("Kafka and Postgres")
+    assert extractor.failed
+    assert extractor.active_name == 'heuristic'
+    assert {e["text"] for e in result["entities"]} == {"Kafka", "Postgres"}
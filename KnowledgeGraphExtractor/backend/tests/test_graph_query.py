@@ -0,0 +1,66 @@
+import pytest
+
+from graph_query import DocumentGraph, EntityNotFound
+
+
+def node(node_id, node_type='CONCEPT', mentions=1, aliases=()):
+    return {"id": node_id, "label": node_id, "type": node_type, "description": "",
+            "mentions": mentions, "aliases": list(aliases)}
+
+
+def edge(source, target):
+    return {"source": source, "target": target, "relation": "related_to", "sentence": ""}
+
+
+def document(*graphs):
+    return DocumentGraph({"chapters": [
+        {"id": i + 1, "knowledge_graph": {"nodes": nodes, "edges": edges}}
+        for i, (nodes, edges) in enumerate(graphs)
+    ]})
+
+
+@pytest.fixture
+def chain():
+    # A - B - C - D, with only A and D typed ORG
+    return document((
+        [node("A", "ORG"), node("B"), node("C"), node("D", "ORG")],
+        [edge("A", "B"), edge("B", "C"), edge("C", "D")]
+    ))
+
+
+def test_neighborhood_hops(chain):
+    result = chain.index().neighborhood("A", hops=2)
+    assert {n["id"] for n in result["nodes"]} == {"A", "B", "C"}
+    assert result["stats"]["total_edges"] == 2
+
+
+def test_neighborhood_type_filter_reports_filtered_nodes(chain):
+    result = chain.index().neighborhood("A", hops=3, types={"ORG"})
+    assert {n["id"] for n in result["nodes"]} == {"A", "D"}
+    assert result["edges"] == []
+    assert result["filtered_out"] == 2
+
+
+def test_shortest_path_and_normalized_lookup(chain):
+    result = chain.index().shortest_path("a", "D")
+    assert result["path"] == ["A", "B", "C", "D"]
+    with pytest.raises(EntityNotFound):
+        chain.index().shortest_path("A", "Z")
+
+
+def test_filtered_by_min_degree(chain):
+    result = chain.index().filtered(min_degree=2)
+    assert {n["id"] for n in result["nodes"]} == {"B", "C"}
+
+
+def test_merged_index_combines_chapter_attributes():
+    doc = document(
+        ([node("Kafka", "PERSON", mentions=1, aliases=["KAFKA"])], []),
+        ([node("Kafka", "PRODUCT", mentions=5, aliases=["Apache Kafka"])], []),
+    )
+    merged = doc.index().nodes["Kafka"]
+    assert merged["mentions"] == 6
+    assert merged["aliases"] == ["Apache Kafka", "KAFKA"]
+    assert merged["type"] == "PRODUCT"
+    # Chapter indexes keep their own view
+    assert doc.index(1).nodes["Kafka"]["mentions"] == 1
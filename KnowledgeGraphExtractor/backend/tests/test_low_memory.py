@@ -0,0 +1,120 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import textwrap
+
+from conftest import BACKEND_DIR
+from pdfgen import text_stream, write_pdf
+
+BUDGET_MB = 20
+
+
+def book_pages(count, lines_per_page=60):
+    """Content streams for a book with a chapter heading every 50 pages"""
+    pages = []
+    for n in range(count):
+        lines = [f"Chapter {n // 50 + 1}"] if n % 50 == 0 else []
+        lines += [f"Kafka and Postgres replicate the log on page {n} line {i} with Zookeeper"
+                  for i in range(lines_per_page)]
+        pages.append(text_stream(lines))
+    return pages
+
+
+def test_low_memory_peak_rss_stays_under_budget(tmp_path):
+    pdf_path = tmp_path / 'book.pdf'
+    write_pdf(str(pdf_path), book_pages(1000))
+
+    # Fresh interpreter so the peak reflects only this job on top of the imports.
+    # VmHWM is per address space; ru_maxrss would carry over the parent's peak
+    # across fork/exec.
+    script = textwrap.dedent(f"""
+        import json, resource, sys
+
+        def peak_rss():
+            try:
+                with open('/proc/self/status') as f:
+                    for line in f:
+                        if line.startswith('VmHWM:'):
+                            return int(line.split()[1]) * 1024
+            except OSError:
+                pass
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+        sys.path.insert(0, {BACKEND_DIR!r})
+        import app
+        baseline = app.current_rss_bytes()
+        budget = app.MemoryBudget(app.app.config['JOB_MEMORY_BUDGET_MB'] * 1024 * 1024)
+        total = app.processor.process_pdf_low_memory({str(pdf_path)!r}, 'result.json', {{"file_id": "x"}}, budget)
+        peak = peak_rss()
+        print(json.dumps({{"total": total, "growth": peak - baseline}}))
+    """)
+    # Loading a spaCy model is a per-worker cost, not part of the job budget
+    env = dict(os.environ, KG_JOB_MEMORY_BUDGET_MB=str(BUDGET_MB), KG_PAGE_CACHE_PATH='',
+               KG_EXTRACTOR='heuristic')
+    completed = subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env,
+                               capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    assert report["total"] == 20
+    assert report["growth"] < BUDGET_MB * 1024 * 1024
+    with open(tmp_path / 'result.json', encoding='utf-8') as f:
+        assert json.load(f)["total_chapters"] == 20
+
+
+def test_iter_chapters_matches_detect_chapters(app_module):
+    processor = app_module.processor
+    rng = random.Random(7)
+    words = ['alpha', 'Kafka', 'log', 'replica', 'CHAPTER 3', 'Part 2', '1. Intro', '', 'x' * 60]
+    for _ in range(200):
+        pages = []
+        for _ in range(rng.randint(1, 5)):
+            lines = [' '.join(rng.choice(words) for _ in range(rng.randint(0, 6)))
+                     for _ in range(rng.randint(0, 12))]
+            pages.append('\n'.join(lines) + rng.choice(['', '\n']))
+        streamed = list(processor.iter_chapters(pages))
+        expected = processor.detect_chapters(''.join(pages))
+        if len(expected) == 1:
+            # detect_chapters keeps the raw text for a single chapter
+            assert [c['title'] for c in streamed] in ([], ['Complete Document'])
+            continue
+        assert [(c['title'], c['content'], c['start_line']) for c in streamed] == \
+            [(c['title'], c['content'], c['start_line']) for c in expected]
+        # Splitting long chapters must not swallow headings that follow a split
+        assert merge_parts(processor.iter_chapters(pages, max_chapter_chars=160)) == \
+            [(c['title'], c['content']) for c in expected]
+
+
+def merge_parts(chapters):
+    """(title, content) per chapter with continuation parts joined back on"""
+    merged = []
+    for chapter in chapters:
+        if ' (part ' in chapter['title']:
+            title, content = merged.pop()
+            merged.append((title, content + chapter['content']))
+        else:
+            merged.append((chapter['title'], chapter['content']))
+    return merged
+
+
+def test_heading_right_after_split_starts_a_chapter(app_module):
+    # Each chapter body just exceeds the limit, so a split lands right before the next heading
+    intro = "Introduction\n" + "\n".join(f"intro line {i} about Kafka and logs" for i in range(5))
+    pages = [intro + "\nChapter 2\n" + "replication " * 15 + "\nChapter 3\n" + "partitioning " * 15]
+    chapters = list(app_module.processor.iter_chapters(pages, max_chapter_chars=160))
+    assert [c['title'] for c in chapters] == ['Introduction', 'Chapter 2', 'Chapter 3']
+
+
+def test_no_chapters_leaves_no_result_file(app_module, tmp_path):
+    pdf_path = tmp_path / 'blank.pdf'
+    write_pdf(str(pdf_path), [])
+    result_path = tmp_path / 'result.json'
+
+    budget = app_module.MemoryBudget(BUDGET_MB * 1024 * 1024)
+    total = app_module.processor.process_pdf_low_memory(str(pdf_path), str(result_path), {"file_id": "x"}, budget)
+
+    assert total == 0
+    assert not os.path.exists(result_path)
+    assert not os.path.exists(str(result_path) + '.part')
@@ -0,0 +1,217 @@
+import sqlite3
+
+import PyPDF2
+import pytest
+from PyPDF2.generic import DecodedStreamObject, NameObject
+
+import page_cache
+from page_cache import PageCacheStats, PageTextCache, page_hash
+from pdfgen import text_stream, write_pdf
+
+DRAW_FORM = b'q /Fm0 Do Q'
+
+
+def read_pages(path):
+    return PyPDF2.PdfReader(str(path)).pages
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Deterministic time.time() so LRU order does not depend on timer resolution"""
+    ticks = iter(range(1, 10 ** 6))
+    monkeypatch.setattr(page_cache.time, 'time', lambda: float(next(ticks)))
+
+
+def test_form_xobject_text_changes_page_hash(tmp_path):
+    pdf_path = tmp_path / 'forms.pdf'
+    write_pdf(str(pdf_path), [DRAW_FORM, DRAW_FORM, DRAW_FORM], forms=[
+        {'Fm0': text_stream(['Kafka'])},
+        {'Fm0': text_stream(['Postgres'])},
+        {'Fm0': text_stream(['Kafka'])},
+    ])
+    kafka, postgres, kafka_again = read_pages(pdf_path)
+
+    assert page_hash(kafka) != page_hash(postgres)
+    assert page_hash(kafka) == page_hash(kafka_again)
+
+    cache = PageTextCache(str(tmp_path / 'cache.sqlite3'))
+    assert 'Kafka' in cache.extract(kafka)
+    assert 'Postgres' in cache.extract(postgres)
+    cache.close()
+
+
+def test_multi_stream_page_is_cached(tmp_path):
+    pdf_path = tmp_path / 'streams.pdf'
+    write_pdf(str(pdf_path), [
+        [b'BT /F1 10 Tf 50 780 Td', b'(Kafka) Tj ET'],
+        [b'BT /F1 10 Tf 50 780 Td', b'(Postgres) Tj ET'],
+    ])
+    kafka, postgres = read_pages(pdf_path)
+    assert page_hash(kafka) is not None
+    assert page_hash(kafka) != page_hash(postgres)
+
+    cache = PageTextCache(str(tmp_path / 'cache.sqlite3'))
+    for expected_hits in (0, 1):
+        stats = PageCacheStats()
+        assert 'Kafka' in cache.extract(read_pages(pdf_path)[0], stats)
+        cache.flush()
+        assert (stats.hits, stats.uncacheable) == (expected_hits, 0)
+    cache.close()
+
+
+def test_unhashable_page_is_counted(tmp_path):
+    class BrokenPage:
+        def get_contents(self):
+            raise ValueError("damaged /Contents")
+
+        def extract_text(self):
+            return "Kafka"
+
+    cache = PageTextCache(str(tmp_path / 'cache.sqlite3'))
+    stats = PageCacheStats()
+    assert cache.extract(BrokenPage(), stats) == "Kafka"
+    assert stats.to_dict() == {"hits": 0, "misses": 1, "uncacheable": 1, "hit_rate": 0.0}
+    cache.close()
+
+
+def test_self_drawing_form_is_hashed_once(tmp_path):
+    pdf_path = tmp_path / 'cycle.pdf'
+    write_pdf(str(pdf_path), [DRAW_FORM, DRAW_FORM], forms=[
+        {'Fm0': DRAW_FORM + b'\n' + text_stream(['Kafka'])},
+        {'Fm0': DRAW_FORM + b'\n' + text_stream(['Postgres'])},
+    ])
+    first, second = read_pages(pdf_path)
+
+    assert page_hash(first) is not None
+    assert page_hash(first) != page_hash(second)
+
+
+def test_font_encoding_and_to_unicode_change_page_hash(tmp_path):
+    pdf_path = tmp_path / 'fonts.pdf'
+    write_pdf(str(pdf_path), [text_stream(['Kafka'])])
+    page = read_pages(pdf_path)[0]
+    font = page['/Resources']['/Font']['/F1'].get_object()
+    hashes = [page_hash(page)]
+
+    font[NameObject('/Encoding')] = NameObject('/MacRomanEncoding')
+    hashes.append(page_hash(page))
+    cmap = DecodedStreamObject()
+    cmap.set_data(b'beginbfchar <4B> <004C> endbfchar')
+    font[NameObject('/ToUnicode')] = cmap
+    hashes.append(page_hash(page))
+
+    assert len(set(hashes)) == 3
+
+
+def stored(cache):
+    """Pages on disk and the recorded byte total"""
+    pages = dict(cache._conn.execute('SELECT hash, size FROM pages'))
+    total = cache._conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+    return pages, total
+
+
+def test_size_bound_is_shared_by_connections(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    # Two handles on one file stand in for two worker processes
+    first, second = PageTextCache(path, max_bytes=250), PageTextCache(path, max_bytes=250)
+    for i in range(3):
+        first.put(f'a{i}', 'x' * 50)
+        first.flush()
+        second.put(f'b{i}', 'y' * 50)
+        second.flush()
+    second.put('a2', 'x' * 50)  # already stored by the other worker
+    second.flush()
+
+    pages, total = stored(first)
+    assert total == sum(pages.values()) <= 250
+    assert 'a0' not in pages and 'b2' in pages
+    first.close()
+    second.close()
+
+
+def test_puts_are_buffered_until_flush(tmp_path):
+    cache = PageTextCache(str(tmp_path / 'cache.sqlite3'), batch_bytes=120)
+    cache.put('p1', 'x' * 50)
+    cache.put('p2', 'y' * 50)
+    assert stored(cache) == ({}, 0)
+    assert cache.get('p1') == 'x' * 50  # served from the buffer
+
+    cache.put('p3', 'z' * 50)  # buffer passes batch_bytes
+    assert stored(cache) == ({'p1': 50, 'p2': 50, 'p3': 50}, 150)
+    cache.put('p4', 'w' * 50)
+    cache.close()
+    reopened = PageTextCache(str(tmp_path / 'cache.sqlite3'))
+    assert reopened.get('p4') == 'w' * 50
+    reopened.close()
+
+
+def test_hits_are_batched_and_keep_pages_fresh(tmp_path, clock):
+    cache = PageTextCache(str(tmp_path / 'cache.sqlite3'), max_bytes=100)
+    cache.put('old', 'x' * 50)
+    cache.flush()
+    cache.put('new', 'y' * 50)
+    cache.flush()
+
+    assert cache.get('old') == 'x' * 50
+    last_used = dict(cache._conn.execute('SELECT hash, last_used FROM pages'))
+    assert last_used['old'] < last_used['new']  # not written on the hit itself
+
+    cache.flush()
+    cache.put('newest', 'z' * 50)
+    cache.flush()
+    assert cache.get('old') == 'x' * 50
+    assert cache.get('new') is None
+    assert stored(cache)[1] == 100
+    cache.close()
+
+
+def test_existing_database_gets_byte_total(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = PageTextCache(path)
+    cache.put('p1', 'x' * 70)
+    cache.close()
+    conn = sqlite3.connect(path)
+    conn.execute('DROP TABLE meta')
+    conn.commit()
+    conn.close()
+
+    reopened = PageTextCache(path)
+    assert stored(reopened)[1] == 70
+    reopened.close()
+
+
+def test_document_flushes_hits_once(app_module, tmp_path, monkeypatch):
+    pdf_path = tmp_path / 'book.pdf'
+    write_pdf(str(pdf_path), [text_stream([f'Kafka page {n}']) for n in range(3)])
+    cache = PageTextCache(str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(app_module.processor, 'page_cache', cache)
+
+    app_module.processor.extract_text_from_pdf(str(pdf_path))
+    flushes = []
+    monkeypatch.setattr(cache, 'flush', lambda: flushes.append(len(cache._touched)))
+    stats = PageCacheStats()
+    pages = list(app_module.processor.iter_pdf_pages(str(pdf_path), stats))
+
+    assert len(pages) == 3
+    assert stats.hits == 3
+    assert flushes == [3]
+    cache.close()
+
+
+@pytest.mark.parametrize('low_memory', [False, True])
+def test_result_page_cache_is_null_when_disabled(app_module, tmp_path, monkeypatch, low_memory):
+    pdf_path = tmp_path / 'book.pdf'
+    write_pdf(str(pdf_path), [text_stream(['Chapter 1'] + ['Kafka and Postgres'] * 10),
+                              text_stream(['Chapter 2'] + ['Zookeeper and Kafka'] * 10)])
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(app_module.app.config, 'LOW_MEMORY_MODE', low_memory)
+    assert app_module.processor.page_cache is None
+
+    with open(pdf_path, 'rb') as f:
+        response = app_module.app.test_client().post(
+            '/api/upload', data={'file': (f, 'book.pdf')}, content_type='multipart/form-data')
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    result = response.get_json()
+    assert result["total_chapters"] > 0
+    assert result["page_cache"] is None
@@ -0,0 +1,14 @@
+import json
+
+import serialization
+
+
+def test_dumps_falls_back_for_wide_integers():
+    data = {"big": 2 ** 70, "text": "Zürich"}
+    assert json.loads(serialization.dumps(data)) == data
+
+
+def test_health_reports_json_encoder(app_module):
+    response = app_module.app.test_client().get('/api/health')
+    assert response.status_code == 200
+    assert response.get_json()["json_encoder"] == serialization.encoder_name()
@@ -0,0 +1,31 @@
+import pytest
+
+
+@pytest.fixture
+def simple_app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # creates uploads/ and processed/ on import
+    import simple_app
+    return simple_app
+
+
+def test_main_runs_storage_eviction(simple_app, monkeypatch):
+    calls = []
+
+    class StubServer:
+        def __init__(self, address, handler):
+            pass
+
+        def serve_forever(self):
+            raise KeyboardInterrupt
+
+        def server_close(self):
+            calls.append('closed')
+
+    monkeypatch.setenv('KG_EVICTION_INTERVAL_SECONDS', '60')
+    monkeypatch.setattr(simple_app, 'ThreadingHTTPServer', StubServer)
+    monkeypatch.setattr(simple_app.storage, 'start_background_eviction', lambda interval: calls.append(interval))
+    monkeypatch.setattr(simple_app.storage, 'stop_background_eviction', lambda: calls.append('stopped'))
+
+    simple_app.main()
+
+    assert calls == [60, 'closed', 'stopped']
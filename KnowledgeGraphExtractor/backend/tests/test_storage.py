@@ -0,0 +1,98 @@
+import os
+import time
+
+from storage import STALE_PARTIAL_SECONDS, StorageManager
+
+FILE_ID = '3f2a9c1e-7b4d-4e8a-9c0f-1a2b3c4d5e6f'
+OTHER_ID = 'a1b2c3d4-0000-4000-8000-000000000001'
+NOW = 1_700_000_000
+
+
+def make_storage(tmp_path, **kwargs):
+    return StorageManager(str(tmp_path / 'uploads'), str(tmp_path / 'processed'), **kwargs)
+
+
+def touch(path, size=10, mtime=NOW):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_paths_are_sharded_by_file_id(tmp_path):
+    storage = make_storage(tmp_path)
+    upload = storage.upload_path(FILE_ID, 'book.pdf')
+    result = storage.result_path(FILE_ID)
+
+    assert upload == str(tmp_path / 'uploads' / '3f' / '2a' / f'{FILE_ID}_book.pdf')
+    assert result == str(tmp_path / 'processed' / '3f' / '2a' / f'{FILE_ID}_result.json')
+    assert os.path.isdir(os.path.dirname(upload)) and os.path.isdir(os.path.dirname(result))
+
+
+def test_find_result_prefers_shard_and_falls_back_to_flat_layout(tmp_path):
+    storage = make_storage(tmp_path)
+    assert storage.find_result(FILE_ID) is None
+
+    legacy = touch(str(tmp_path / 'processed' / f'{FILE_ID}_result.json'))
+    assert storage.find_result(FILE_ID) == legacy
+
+    sharded = touch(storage.result_path(FILE_ID))
+    assert storage.find_result(FILE_ID) == sharded
+
+
+def test_discard_upload_respects_setting(tmp_path):
+    kept = make_storage(tmp_path, delete_uploads=False)
+    path = touch(kept.upload_path(FILE_ID, 'book.pdf'))
+    kept.discard_upload(path)
+    assert os.path.exists(path)
+
+    deleting = make_storage(tmp_path)
+    deleting.discard_upload(path)
+    assert not os.path.exists(path)
+    deleting.discard_upload(path)  # already gone: logged, not raised
+
+
+def test_evict_removes_expired_results_and_uploads(tmp_path):
+    storage = make_storage(tmp_path, result_ttl_seconds=3600)
+    old_result = touch(storage.result_path(FILE_ID), mtime=NOW - 7200)
+    old_upload = touch(storage.upload_path(FILE_ID, 'book.pdf'), mtime=NOW - 7200)
+    fresh_result = touch(storage.result_path(OTHER_ID), mtime=NOW - 60)
+    keep = touch(str(tmp_path / 'processed' / '.gitkeep'), mtime=NOW - 7200)
+
+    assert storage.evict(now=NOW) == 2
+    assert not os.path.exists(old_result) and not os.path.exists(old_upload)
+    assert os.path.exists(fresh_result) and os.path.exists(keep)
+
+
+def test_evict_removes_oldest_results_over_size_limit(tmp_path):
+    storage = make_storage(tmp_path, max_processed_bytes=250)
+    ids = [f'0000000{n}-0000-4000-8000-000000000000' for n in range(3)]
+    paths = [touch(storage.result_path(file_id), size=100, mtime=NOW - 300 + n) for n, file_id in enumerate(ids)]
+    partial = touch(storage.result_path(OTHER_ID) + '.part', size=1000)
+
+    assert storage.evict(now=NOW) == 1
+    assert [os.path.exists(p) for p in paths] == [False, True, True]
+    assert os.path.exists(partial)  # in-progress writes are not counted or removed
+
+
+def test_compact_shards_flat_files_and_leaves_others(tmp_path):
+    storage = make_storage(tmp_path)
+    processed, uploads = tmp_path / 'processed', tmp_path / 'uploads'
+    flat_result = touch(str(processed / f'{FILE_ID}_result.json'))
+    flat_upload = touch(str(uploads / f'{FILE_ID}_book.pdf'))
+    keep = touch(str(processed / '.gitkeep'))
+    notes = touch(str(uploads / 'notes_for_admins.txt'))
+    stale = touch(str(processed / '3f' / '2a' / f'{FILE_ID}_result.json.part'),
+                  mtime=time.time() - STALE_PARTIAL_SECONDS - 60)
+    os.makedirs(processed / 'ff' / 'ee')
+
+    stats = storage.compact()
+
+    assert stats == {"moved": 2, "evicted": 0}
+    assert storage.find_result(FILE_ID) == storage.result_path(FILE_ID)
+    assert os.path.exists(storage.upload_path(FILE_ID, 'book.pdf'))
+    assert not os.path.exists(flat_result) and not os.path.exists(flat_upload)
+    assert os.path.exists(keep) and os.path.exists(notes)
+    assert not os.path.exists(stale)
+    assert not os.path.exists(processed / 'ff')